@@ -16,7 +16,13 @@ COPY requirements.txt .
 RUN pip install --no-cache-dir -r requirements.txt
 
 # Copy application code
-COPY ml_service.py .
+COPY *.py ./
+
+# Bake a trained model bundle into the image so containers start without retraining. It lives
+# outside ML_MODEL_DIR, which is usually a volume, and is copied there when the volume has no bundle
+RUN ML_MODEL_DIR=/app/baked python ml_service.py --train && ML_MODEL_DIR=/app/baked python ml_service.py --build-grid
+ENV ML_MODEL_DIR=/app/models
+ENV ML_BAKED_MODEL_DIR=/app/baked
 
 # Expose port
 EXPOSE 8000
@@ -25,5 +31,6 @@ EXPOSE 8000
 HEALTHCHECK --interval=30s --timeout=10s --start-period=5s --retries=3 \
   CMD python -c "import requests; requests.get('http://localhost:8000/health')"
 
-# Start application
-CMD ["python", "ml_service.py"]
+# Start application: pre-fork gunicorn workers sharing the preloaded model bundle
+# (ML_WORKERS, ML_THREADS and ML_TIMEOUT configure gunicorn.conf.py)
+CMD ["gunicorn", "-c", "gunicorn.conf.py", "wsgi:app"]
@@ -0,0 +1,275 @@
+# ML Service Benchmark Suite
+# Measures inference latency and throughput, cold start, data generation and training
+# time on the local machine and writes the results to a JSON file for comparison.
+#
+#   python benchmark.py --output results.json
+#   python benchmark.py --quick --output new.json --compare results.json
+
+import argparse
+import http.client
+import json
+import logging
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far (ru_maxrss is KB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+def latency_summary(samples):
+    """Percentiles of a list of latencies in seconds, reported in milliseconds"""
+    ms = np.asarray(samples) * 1000
+    return {
+        'count': len(ms),
+        'mean_ms': round(float(ms.mean()), 3),
+        'p50_ms': round(float(np.percentile(ms, 50)), 3),
+        'p95_ms': round(float(np.percentile(ms, 95)), 3),
+        'p99_ms': round(float(np.percentile(ms, 99)), 3),
+        'max_ms': round(float(ms.max()), 3)
+    }
+
+def random_records(n, random_state=0):
+    """Request records spread over realistic feature ranges, reproducible for a seed"""
+    rng = np.random.default_rng(random_state)
+    columns = {
+        'nitrogen': rng.uniform(0, 120, n),
+        'phosphorus': rng.uniform(0, 90, n),
+        'potassium': rng.uniform(0, 80, n),
+        'temperature': rng.uniform(5, 45, n),
+        'humidity': rng.uniform(30, 95, n),
+        'ph': rng.uniform(4.5, 9.0, n),
+        'rainfall': rng.uniform(200, 2500, n)
+    }
+    return [{key: round(float(values[i]), 2) for key, values in columns.items()} for i in range(n)]
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+def bench_dataset_generation(service, sizes):
+    results = {}
+    for n in sizes:
+        seconds, _ = timed(service.create_synthetic_dataset, n)
+        results[str(n)] = {'seconds': round(seconds, 4), 'peak_rss_mb': peak_rss_mb()}
+    return results
+
+def bench_training(service, sizes):
+    results = {}
+    for n in sizes:
+        seconds, bundle = timed(service.train_models, n)
+        results[str(n)] = {
+            'seconds': round(seconds, 4),
+            'accuracy': round(bundle.accuracy, 4),
+            'timings': {stage: round(value, 4) for stage, value in bundle.metadata['timings'].items()},
+            'peak_rss_mb': peak_rss_mb()
+        }
+    return results
+
+def bench_cold_start(service, repeats):
+    samples = []
+    for _ in range(repeats):
+        seconds, loaded = timed(service.load_models)
+        if not loaded:
+            raise RuntimeError('load_models found no model bundle')
+        samples.append(seconds)
+    return {'median_seconds': round(float(np.median(samples)), 4),
+            'min_seconds': round(min(samples), 4), 'repeats': repeats}
+
+def bench_single_row(client, n_requests):
+    records = random_records(n_requests, random_state=1)
+    for record in records[:20]:  # Warm up
+        client.post('/predict', json=record)
+
+    samples = []
+    for record in records:
+        start = time.perf_counter()
+        response = client.post('/predict', json=record)
+        samples.append(time.perf_counter() - start)
+        if response.status_code != 200:
+            raise RuntimeError(f"/predict returned {response.status_code}")
+    return latency_summary(samples)
+
+def bench_batch(client, batch_sizes, min_seconds):
+    results = {}
+    for size in batch_sizes:
+        records = random_records(size, random_state=2)
+        client.post('/predict/batch', json={'records': records})  # Warm up
+
+        # At least three requests, and enough to fill min_seconds
+        samples = []
+        while len(samples) < 3 or sum(samples) < min_seconds:
+            start = time.perf_counter()
+            response = client.post('/predict/batch', json={'records': records})
+            samples.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                raise RuntimeError(f"/predict/batch returned {response.status_code}")
+
+        median = float(np.median(samples))
+        results[str(size)] = {
+            'median_seconds': round(median, 5),
+            'rows_per_second': round(size / median, 1),
+            'repeats': len(samples)
+        }
+    return results
+
+def bench_http_load(app, n_requests, concurrency):
+    """Drive a local threaded HTTP server from client threads, one connection per request"""
+    from werkzeug.serving import make_server
+
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    port = server.server_port
+    server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+    server_thread.start()
+
+    bodies = [json.dumps(record) for record in random_records(n_requests, random_state=3)]
+    samples = []
+    errors = []
+    lock = threading.Lock()
+
+    def client(indices):
+        local = []
+        for i in indices:
+            start = time.perf_counter()
+            try:
+                connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+                connection.request('POST', '/predict', bodies[i], {'Content-Type': 'application/json'})
+                response = connection.getresponse()
+                response.read()
+                connection.close()
+                if response.status != 200:
+                    raise RuntimeError(f"status {response.status}")
+                local.append(time.perf_counter() - start)
+            except Exception as e:
+                with lock:
+                    errors.append(str(e))
+        with lock:
+            samples.extend(local)
+
+    threads = [threading.Thread(target=client, args=(range(i, n_requests, concurrency),))
+               for i in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+
+    result = latency_summary(samples) if samples else {}
+    result.update(concurrency=concurrency, errors=len(errors),
+                  requests_per_second=round(len(samples) / elapsed, 1))
+    return result
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+def flatten(results, prefix=''):
+    """Numeric leaves of a nested result dict keyed by dotted path"""
+    flat = {}
+    for key, value in results.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(flatten(value, path))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = value
+    return flat
+
+def compare(baseline, current):
+    """Print the relative change of every numeric result present in both files"""
+    old, new = flatten(baseline['results']), flatten(current['results'])
+    print(f"{'metric':60} {'baseline':>12} {'current':>12} {'change':>8}")
+    for path in sorted(old.keys() & new.keys()):
+        change = f"{(new[path] - old[path]) / old[path] * 100:+.1f}%" if old[path] else 'n/a'
+        print(f"{path:60} {old[path]:>12} {new[path]:>12} {change:>8}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the AI Crop Recommendation ML service')
+    parser.add_argument('--output', default='benchmark_results.json', help='JSON file to write results to')
+    parser.add_argument('--compare', help='earlier results file to compare against')
+    parser.add_argument('--quick', action='store_true', help='smaller sizes for a fast smoke run')
+    parser.add_argument('--dataset-sizes', type=int, nargs='+', help='rows for dataset generation timing')
+    parser.add_argument('--train-sizes', type=int, nargs='+', help='rows for training timing')
+    parser.add_argument('--serve-samples', type=int, default=5000, help='training rows of the served model')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', help='records per /predict/batch request')
+    parser.add_argument('--requests', type=int, help='single-row /predict requests')
+    parser.add_argument('--concurrency', type=int, default=4, help='client threads for the HTTP load test')
+    parser.add_argument('--cache', action='store_true', help='keep the prediction cache on (off by default)')
+    args = parser.parse_args()
+
+    dataset_sizes = args.dataset_sizes or ([10_000, 100_000] if args.quick else [10_000, 100_000, 1_000_000])
+    train_sizes = args.train_sizes or ([1000, 5000] if args.quick else [1000, 5000, 20000])
+    batch_sizes = args.batch_sizes or ([1, 100, 1000] if args.quick else [1, 10, 100, 1000, 10000])
+    n_requests = args.requests or (200 if args.quick else 1000)
+
+    # Keep benchmark models out of the real model directory, and measure the models rather than the cache
+    os.environ['ML_MODEL_DIR'] = tempfile.mkdtemp(prefix='ml-benchmark-')
+    if not args.cache:
+        os.environ['ML_PREDICTION_CACHE'] = '0'
+
+    import sklearn
+    import ml_service as service
+    service.logger.setLevel(logging.WARNING)  # Per-request info logging would dominate the output
+
+    results = {}
+    print('Timing synthetic dataset generation...')
+    results['dataset_generation'] = bench_dataset_generation(service, dataset_sizes)
+    print('Timing training...')
+    results['training'] = bench_training(service, train_sizes)
+
+    # Serve the same model size on every run so latency numbers stay comparable
+    service.train_models(args.serve_samples)
+    print('Timing cold start...')
+    results['cold_start'] = bench_cold_start(service, repeats=3 if args.quick else 5)
+
+    client = service.app.test_client()
+    print('Timing single-row /predict...')
+    results['predict_single'] = bench_single_row(client, n_requests)
+    print('Timing /predict/batch...')
+    results['predict_batch'] = bench_batch(client, batch_sizes, min_seconds=1.0 if args.quick else 3.0)
+    print('Running HTTP load test...')
+    results['http_load'] = bench_http_load(service.app, n_requests, args.concurrency)
+    results['peak_rss_mb'] = peak_rss_mb()
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'git_commit': git_commit(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'sklearn': sklearn.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'model_version': service.model_version,
+            'inference_engine': service.INFERENCE_ENGINE,
+            'micro_batching': service.MICRO_BATCHING,
+            'prediction_cache': service.PREDICTION_CACHE_ENABLED,
+            'serve_samples': args.serve_samples
+        },
+        'results': results
+    }
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+
+if __name__ == '__main__':
+    main()
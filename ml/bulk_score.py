@@ -0,0 +1,236 @@
+# Offline Bulk Scoring
+# Scores a large CSV or Parquet file of soil records in a pool of worker processes, each
+# memory-mapping the same model bundle, and writes one output file per input shard.
+#
+#   python bulk_score.py soil_tests.csv --output-dir scored/ --workers 4
+#   python bulk_score.py soil_tests.parquet --output-dir scored/ --output-format csv
+#
+# Input columns use the /predict field names (nitrogen, phosphorus, potassium, temperature,
+# humidity, ph, rainfall) plus an optional id; missing columns and blank cells take the same
+# defaults as the API. Part files are numbered in input order.
+
+import argparse
+import io
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import ml_service
+from ml_service import (
+    MIN_CROP_PROBABILITY, TOP_K_CROPS, calculate_risks_batch, frame_feature_matrix,
+    load_scoring_bundle, rank_crops, score_feature_matrix
+)
+
+logger = logging.getLogger('bulk_score')
+
+# Rows scored per model pass inside a shard; bounds worker memory
+CHUNK_ROWS = 100_000
+
+_worker_bundle = None
+
+def _init_worker(bundle_path):
+    """Load the bundle and crop catalog once per worker; the bundle's arrays are memory-mapped,
+    so workers share the pages"""
+    global _worker_bundle
+    ml_service.logger.setLevel(logging.WARNING)
+    ml_service.metrics.enabled = False
+    # Same engine choice and parity check as the API (ML_INFERENCE_ENGINE, ML_COMPILED_FLOAT32)
+    _worker_bundle = load_scoring_bundle(bundle_path)
+    # Rank against the same catalog (ML_CROP_CATALOG) as the API; the suitability grid is not used here
+    ml_service.load_crop_catalog(rebuild_grid=False)
+
+def plan_csv_shards(path, shard_bytes):
+    """Split a CSV into (start, end) byte ranges that begin and end on line boundaries"""
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        header = f.readline()
+        boundaries = [f.tell()]
+        while boundaries[-1] < size:
+            f.seek(min(boundaries[-1] + shard_bytes, size))
+            if f.tell() < size:
+                f.readline()  # Finish the current line
+            boundaries.append(f.tell())
+    return header, list(zip(boundaries[:-1], boundaries[1:]))
+
+def plan_parquet_shards(path, shard_rows):
+    """Group a Parquet file's row groups into shards of roughly shard_rows rows"""
+    import pyarrow.parquet as pq
+
+    metadata = pq.ParquetFile(path).metadata
+    shards, current, rows = [], [], 0
+    for i in range(metadata.num_row_groups):
+        current.append(i)
+        rows += metadata.row_group(i).num_rows
+        if rows >= shard_rows:
+            shards.append(current)
+            current, rows = [], 0
+    if current:
+        shards.append(current)
+    return shards
+
+def iter_shard_frames(task):
+    """Read one shard in CHUNK_ROWS pieces"""
+    if task['input_format'] == 'csv':
+        start, end = task['byte_range']
+        with open(task['input'], 'rb') as f:
+            f.seek(start)
+            data = task['header'] + f.read(end - start)
+        yield from pd.read_csv(io.BytesIO(data), chunksize=CHUNK_ROWS, dtype=str, keep_default_na=False,
+                               skipinitialspace=True)
+    else:
+        import pyarrow.parquet as pq
+
+        parquet = pq.ParquetFile(task['input'])
+        wanted = set(ml_service.REQUEST_FEATURES) | {'id'}
+        columns = [name for name in parquet.schema_arrow.names if name in wanted]
+        for batch in parquet.iter_batches(batch_size=CHUNK_ROWS, row_groups=task['row_groups'], columns=columns):
+            yield batch.to_pandas()
+
+def score_frame(bundle, frame, top_k):
+    """Score a DataFrame of request columns into an output DataFrame, one row per input row"""
+    X = frame_feature_matrix(frame)
+    valid = np.isfinite(X).all(axis=1)
+    output = pd.DataFrame({'id': frame['id'].to_numpy()} if 'id' in frame else {}, index=range(len(frame)))
+    output['error'] = np.where(valid, None, 'Invalid input data format')
+
+    n_valid = int(valid.sum())
+    top_crops = np.full((len(frame), top_k), None, dtype=object)
+    top_values = {name: np.full((len(frame), top_k), np.nan) for name in ['confidence', 'yield', 'suitability']}
+    predicted_yield = np.full(len(frame), np.nan)
+    risks = np.full(len(frame), None, dtype=object)
+
+    if n_valid:
+        X_valid = X[valid]
+        crop_probabilities, yield_valid = score_feature_matrix(bundle, X_valid)
+        top_index, top_probabilities, yield_factors, adjusted_yield = rank_crops(
+            bundle, X_valid, crop_probabilities, top_k)
+
+        # Same cut-off as the API: very low probability crops are left out
+        keep = top_probabilities >= MIN_CROP_PROBABILITY
+        classes = bundle.label_encoder.classes_.astype(object)
+        top_crops[valid] = np.where(keep, classes[top_index], None)
+        top_values['confidence'][valid] = np.where(keep, top_probabilities, np.nan)
+        top_values['yield'][valid] = np.where(keep, np.round(adjusted_yield, 2), np.nan)
+        top_values['suitability'][valid] = np.where(keep, np.round(yield_factors * 100, 1), np.nan)
+        predicted_yield[valid] = np.round(yield_valid, 2)
+        risks[valid] = [';'.join(risk['type'] for risk in row) for row in calculate_risks_batch(X_valid)]
+
+    for rank in range(top_k):
+        output[f'crop_{rank + 1}'] = top_crops[:, rank]
+        output[f'confidence_{rank + 1}'] = top_values['confidence'][:, rank]
+        output[f'yield_{rank + 1}'] = top_values['yield'][:, rank]
+        output[f'suitability_{rank + 1}'] = top_values['suitability'][:, rank]
+    output['predicted_yield'] = predicted_yield
+    output['risk_factors'] = risks
+
+    # Fixed string columns keep every chunk's schema the same, even when a chunk is all valid
+    for column in ['error', 'risk_factors'] + [f'crop_{rank + 1}' for rank in range(top_k)]:
+        output[column] = output[column].astype('string')
+    return output, len(frame) - n_valid
+
+def score_shard(task):
+    """Score one shard in the worker process and write its part file"""
+    start = time.perf_counter()
+    path = os.path.join(task['output_dir'], f"part-{task['shard']:05d}.{task['output_format']}")
+    rows = errors = 0
+    writer = None
+
+    try:
+        for frame in iter_shard_frames(task):
+            output, rejected = score_frame(_worker_bundle, frame, task['top_k'])
+            rows += len(output)
+            errors += rejected
+
+            if task['output_format'] == 'parquet':
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+
+                table = pa.Table.from_pandas(output, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table.cast(writer.schema))
+            else:
+                output.to_csv(path, mode='a' if rows > len(output) else 'w', header=rows == len(output),
+                              index=False)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    return {'shard': task['shard'], 'path': path, 'rows': rows, 'errors': errors,
+            'seconds': round(time.perf_counter() - start, 3)}
+
+def main():
+    parser = argparse.ArgumentParser(description='Score a CSV or Parquet file of soil records offline')
+    parser.add_argument('input', help='CSV or Parquet file with /predict field names as columns')
+    parser.add_argument('--output-dir', required=True, help='directory for part files and the manifest')
+    parser.add_argument('--bundle', default=ml_service.BUNDLE_PATH, help='model bundle to score with')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='worker processes')
+    parser.add_argument('--shard-rows', type=int, default=500_000, help='approximate rows per shard')
+    parser.add_argument('--output-format', choices=['csv', 'parquet'], help='defaults to the input format')
+    parser.add_argument('--top-k', type=int, default=TOP_K_CROPS, help='crops reported per row')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if not os.path.exists(args.bundle):
+        raise SystemExit(f"No model bundle at {args.bundle}; create one with: python ml_service.py --train")
+
+    # Fail before starting workers if the crop catalog cannot be read, and record its version
+    catalog = ml_service.load_crop_catalog(rebuild_grid=False)
+
+    input_format = 'parquet' if args.input.endswith(('.parquet', '.pq')) else 'csv'
+    output_format = args.output_format or input_format
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    base = {'input': args.input, 'input_format': input_format, 'output_dir': args.output_dir,
+            'output_format': output_format, 'top_k': args.top_k}
+    if input_format == 'csv':
+        # Estimate bytes per row from the start of the file to size the byte ranges
+        with open(args.input, 'rb') as f:
+            sample = f.read(1 << 20)
+        bytes_per_row = len(sample) / max(sample.count(b'\n'), 1)
+        header, ranges = plan_csv_shards(args.input, max(int(args.shard_rows * bytes_per_row), 1 << 16))
+        tasks = [dict(base, shard=i, header=header, byte_range=byte_range) for i, byte_range in enumerate(ranges)]
+    else:
+        tasks = [dict(base, shard=i, row_groups=groups)
+                 for i, groups in enumerate(plan_parquet_shards(args.input, args.shard_rows))]
+
+    logger.info(f"Scoring {args.input} in {len(tasks)} shards with {args.workers} workers")
+    start = time.perf_counter()
+    shards = []
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker,
+                             initargs=(args.bundle,)) as executor:
+        futures = [executor.submit(score_shard, task) for task in tasks]
+        for future in as_completed(futures):
+            result = future.result()
+            shards.append(result)
+            logger.info(f"Shard {result['shard']}: {result['rows']} rows in {result['seconds']}s")
+
+    shards.sort(key=lambda result: result['shard'])
+    elapsed = time.perf_counter() - start
+    rows = sum(result['rows'] for result in shards)
+    manifest = {
+        'input': os.path.abspath(args.input),
+        'bundle': os.path.abspath(args.bundle),
+        'model_version': ml_service.model_version,
+        'crop_catalog': {'source': catalog.source, 'version': catalog.version, 'entries': len(catalog)},
+        'rows': rows,
+        'errors': sum(result['errors'] for result in shards),
+        'seconds': round(elapsed, 3),
+        'rows_per_second': round(rows / elapsed, 1) if elapsed else 0.0,
+        'completed_at': datetime.now().isoformat(),
+        'shards': shards
+    }
+    with open(os.path.join(args.output_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    logger.info(f"Scored {rows} rows in {elapsed:.1f}s ({manifest['rows_per_second']} rows/s), "
+                f"{manifest['errors']} rejected")
+
+if __name__ == '__main__':
+    main()
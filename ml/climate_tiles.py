@@ -0,0 +1,194 @@
+# Climate and Soil Tiles
+# Regular latitude/longitude raster of seasonal climate normals and soil properties, used to
+# fill request features from a location instead of national defaults. Values are float32 in
+# one (season, lat, lon, field) array, so every field of a cell is one contiguous read and a
+# lookup is an index computation, never a search. Cells without data hold NaN.
+#
+# Build a tile file from a CSV of point values or a NumPy .npz of gridded layers:
+#   python climate_tiles.py normals.csv --step 0.1 --output climate_tiles.joblib
+#   python climate_tiles.py soilgrids.npz --output climate_tiles.joblib
+
+import argparse
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+
+TILES_FORMAT = 1
+TILE_FIELDS = ['nitrogen', 'phosphorus', 'potassium', 'temperature', 'humidity', 'ph', 'rainfall']
+DEFAULT_SEASON = 'annual'
+
+class ClimateTiles:
+    """Per-season raster of feature values on grid points lat0 + i * step, lon0 + j * step"""
+
+    def __init__(self, fields, seasons, lat0, lon0, step, values, source=None):
+        self.fields = list(fields)
+        self.seasons = list(seasons)
+        self.lat0, self.lon0, self.step = float(lat0), float(lon0), float(step)
+        self.values = values  # (n_seasons, n_lat, n_lon, n_fields) float32
+        self.source = source
+        self.season_index = {season: i for i, season in enumerate(self.seasons)}
+
+    @property
+    def shape(self):
+        return self.values.shape[1:3]
+
+    @property
+    def bounds(self):
+        """(south, west, north, east) of the grid points"""
+        n_lat, n_lon = self.shape
+        return (self.lat0, self.lon0, self.lat0 + (n_lat - 1) * self.step, self.lon0 + (n_lon - 1) * self.step)
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes
+
+    def lookup(self, lat, lon, season=None, interpolate=True):
+        """Field values at a location, bilinear between the four surrounding points or from the
+        nearest one; fields without data there are left out. Empty off the raster"""
+        if season is None:
+            layer = self.values[0]
+        elif season in self.season_index:
+            layer = self.values[self.season_index[season]]
+        else:
+            raise ValueError(f"Unknown season {season!r}, expected one of {', '.join(self.seasons)}")
+
+        n_lat, n_lon = self.shape
+        y = (lat - self.lat0) / self.step
+        x = (lon - self.lon0) / self.step
+        if not (-0.5 <= y <= n_lat - 0.5 and -0.5 <= x <= n_lon - 0.5):
+            return {}  # Also false for NaN
+
+        if not interpolate or n_lat < 2 or n_lon < 2:
+            values = layer[min(int(round(y)), n_lat - 1), min(int(round(x)), n_lon - 1)]
+        else:
+            i = min(max(int(np.floor(y)), 0), n_lat - 2)
+            j = min(max(int(np.floor(x)), 0), n_lon - 2)
+            dy = min(max(y - i, 0.0), 1.0)
+            dx = min(max(x - j, 0.0), 1.0)
+            cells = layer[i:i + 2, j:j + 2].reshape(4, -1).astype(np.float64)
+            weights = np.array([(1 - dy) * (1 - dx), (1 - dy) * dx, dy * (1 - dx), dy * dx])[:, np.newaxis]
+            # Points without data drop out and the others are reweighted, which keeps coasts filled
+            weights = np.where(np.isfinite(cells), weights, 0.0)
+            total = weights.sum(axis=0)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                values = np.where(total > 0, (np.nan_to_num(cells) * weights).sum(axis=0) / total, np.nan)
+
+        return {field: float(value) for field, value in zip(self.fields, values.tolist()) if value == value}
+
+    def save(self, path):
+        """Write the tiles uncompressed so the raster can be memory-mapped"""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        joblib.dump({
+            'format': TILES_FORMAT,
+            'fields': self.fields,
+            'seasons': self.seasons,
+            'origin': (self.lat0, self.lon0),
+            'step': self.step,
+            'values': np.ascontiguousarray(self.values, dtype=np.float32)
+        }, tmp_path)
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        """Load a tile file with its raster memory-mapped read-only"""
+        payload = joblib.load(path, mmap_mode='r')
+        if payload.get('format') != TILES_FORMAT:
+            raise ValueError(f"Unsupported climate tiles format: {payload.get('format')}")
+        lat0, lon0 = payload['origin']
+        return cls(payload['fields'], payload['seasons'], lat0, lon0, payload['step'],
+                   np.asarray(payload['values']), os.path.abspath(path))
+
+    @classmethod
+    def from_points(cls, path, step, fields=None, chunk_rows=500_000):
+        """Average CSV rows of lat, lon, optional season and field columns into grid cells of step degrees"""
+        header = pd.read_csv(path, nrows=0).columns.tolist()
+        fields = fields or [field for field in TILE_FIELDS if field in header]
+        missing = [column for column in ['lat', 'lon'] + fields if column not in header]
+        if missing or not fields:
+            raise ValueError(f"{path} needs lat, lon and at least one of {', '.join(TILE_FIELDS)} columns"
+                             + (f"; missing {', '.join(missing)}" if missing else ''))
+        has_season = 'season' in header
+
+        # First pass over the coordinates only, for the extent and the seasons
+        south, west, north, east = np.inf, np.inf, -np.inf, -np.inf
+        seasons = set()
+        for chunk in pd.read_csv(path, usecols=['lat', 'lon'] + (['season'] if has_season else []),
+                                 chunksize=chunk_rows):
+            south, north = min(south, chunk['lat'].min()), max(north, chunk['lat'].max())
+            west, east = min(west, chunk['lon'].min()), max(east, chunk['lon'].max())
+            if has_season:
+                seasons.update(chunk['season'].astype(str).str.strip().str.lower().unique())
+        seasons = sorted(seasons) if has_season else [DEFAULT_SEASON]
+
+        lat0, lon0 = np.floor(south / step) * step, np.floor(west / step) * step
+        n_lat = int(round((north - lat0) / step)) + 1
+        n_lon = int(round((east - lon0) / step)) + 1
+        n_cells = len(seasons) * n_lat * n_lon
+        sums = np.zeros((n_cells, len(fields)))
+        counts = np.zeros((n_cells, len(fields)))
+
+        season_index = {season: i for i, season in enumerate(seasons)}
+        for chunk in pd.read_csv(path, usecols=['lat', 'lon'] + fields + (['season'] if has_season else []),
+                                 chunksize=chunk_rows):
+            i = np.rint((chunk['lat'].to_numpy(dtype=np.float64) - lat0) / step).astype(np.int64)
+            j = np.rint((chunk['lon'].to_numpy(dtype=np.float64) - lon0) / step).astype(np.int64)
+            k = (chunk['season'].astype(str).str.strip().str.lower().map(season_index).to_numpy(dtype=np.int64)
+                 if has_season else np.zeros(len(chunk), dtype=np.int64))
+            cell = (k * n_lat + i) * n_lon + j
+            values = chunk[fields].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64)
+            for f in range(len(fields)):
+                known = np.isfinite(values[:, f])
+                sums[:, f] += np.bincount(cell[known], values[known, f], minlength=n_cells)
+                counts[:, f] += np.bincount(cell[known], minlength=n_cells)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = (sums / counts).astype(np.float32)
+        return cls(fields, seasons, lat0, lon0, step,
+                   means.reshape(len(seasons), n_lat, n_lon, len(fields)), os.path.abspath(path))
+
+    @classmethod
+    def from_arrays(cls, path):
+        """Tiles from an .npz with evenly spaced 1-D lat and lon arrays and one layer per field,
+        shaped (lat, lon) or (season, lat, lon) with a matching seasons array"""
+        with np.load(path, allow_pickle=False) as arrays:
+            lat, lon = arrays['lat'].astype(np.float64), arrays['lon'].astype(np.float64)
+            fields = [field for field in TILE_FIELDS if field in arrays]
+            if not fields or len(lat) < 1 or len(lon) < 1:
+                raise ValueError(f"{path} needs lat, lon and at least one of {', '.join(TILE_FIELDS)} arrays")
+            seasons = [str(season).lower() for season in arrays['seasons']] if 'seasons' in arrays else [DEFAULT_SEASON]
+
+            step = lat[1] - lat[0] if len(lat) > 1 else lon[1] - lon[0]
+            for axis in (lat, lon):
+                if len(axis) > 1 and not np.allclose(np.diff(axis), step):
+                    raise ValueError('lat and lon must be increasing with one common step')
+
+            values = np.empty((len(seasons), len(lat), len(lon), len(fields)), dtype=np.float32)
+            for f, field in enumerate(fields):
+                layer = arrays[field]
+                values[..., f] = layer if layer.ndim == 3 else layer[np.newaxis]
+        return cls(fields, seasons, lat[0], lon[0], step, values, os.path.abspath(path))
+
+def build_tiles(path, step=None, fields=None):
+    """Tiles from a .csv of points (which needs step) or an .npz of gridded layers"""
+    if path.endswith('.npz'):
+        return ClimateTiles.from_arrays(path)
+    if step is None:
+        raise ValueError('--step is required for CSV input')
+    return ClimateTiles.from_points(path, step, fields)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build a memory-mappable climate and soil tile file')
+    parser.add_argument('input', help='CSV of lat, lon, [season,] field columns, or .npz of gridded layers')
+    parser.add_argument('--step', type=float, help='grid spacing in degrees for CSV input, e.g. 0.1')
+    parser.add_argument('--fields', help=f"comma-separated fields to keep (default: those present of {','.join(TILE_FIELDS)})")
+    parser.add_argument('--output', default='climate_tiles.joblib', help='tile file to write')
+    args = parser.parse_args()
+
+    tiles = build_tiles(args.input, args.step, args.fields.split(',') if args.fields else None)
+    tiles.save(args.output)
+    coverage = float(np.isfinite(tiles.values).mean())
+    print(f"Wrote {args.output}: {tiles.shape[0]}x{tiles.shape[1]} points every {tiles.step} degrees, "
+          f"seasons {tiles.seasons}, fields {tiles.fields}, {tiles.nbytes} bytes, {coverage:.1%} of cells with data")
@@ -0,0 +1,217 @@
+# Crop Catalog
+# Columnar store of crops, varieties and regional variants: one NumPy array per attribute,
+# categorical codes for seasons and regions, and a name index. Scoring reads whole columns,
+# so ranking thousands of entries is a few vectorized operations and nothing is looked up
+# row by row.
+#
+# Catalogs load from a CSV file with one row per entry (see CSV_COLUMNS) or from the
+# uncompressed joblib file written by save(), whose arrays are memory-mapped.
+
+import hashlib
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+
+CATALOG_FORMAT = 1
+CONDITIONS = ['ph', 'temp', 'humidity', 'rainfall']  # Order of the bounds columns
+
+# crop defaults to name and region to '' (every region); the rest are required
+CSV_COLUMNS = ['name', 'crop', 'region', 'season', 'duration_days', 'market_price', 'yield_min', 'yield_max'] + [
+    f"{condition}_{bound}" for condition in CONDITIONS for bound in ('min', 'max')
+]
+
+def plain_number(value):
+    """A float as an int when it is whole, so whole prices and bounds serialize without a trailing .0"""
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+def top_k_indices(scores, k):
+    """Indices of the k highest scores, highest first, ties in index order like a stable sort"""
+    if k >= len(scores):
+        return np.argsort(-scores, kind='stable')[:k]
+    # Partition instead of sorting everything; ties at the cut keep the lowest indices
+    kth = -np.partition(-scores, k - 1)[k - 1]
+    above = np.flatnonzero(scores > kth)
+    chosen = np.concatenate([above, np.flatnonzero(scores == kth)[:k - len(above)]])
+    return chosen[np.argsort(-scores[chosen], kind='stable')]
+
+class CropCatalog:
+    """Crop entries as parallel arrays, indexed by unique entry name"""
+
+    def __init__(self, names, crops, regions, seasons, duration, market_price, yield_range, bounds, source='built-in'):
+        self.names = np.asarray(names, dtype=object)
+        self.crops = np.asarray(crops, dtype=object)
+        self.region_codes, self.region_names = regions    # int codes and their categories
+        self.season_codes, self.season_names = seasons
+        self.duration = np.asarray(duration)
+        self.market_price = np.asarray(market_price)
+        self.yield_range = np.asarray(yield_range)      # (n, 2) tonnes/hectare
+        self.bounds = np.asarray(bounds)                # (n, len(CONDITIONS), 2) optimal (low, high)
+        self.base_yield = self.yield_range.mean(axis=1)
+        self.source = source
+
+        self.name_list = self.names.tolist()
+        self.index = {}
+        for row, name in enumerate(self.name_list):
+            if name in self.index:
+                raise ValueError(f"Duplicate crop catalog entry: {name}")
+            self.index[name] = row
+
+        # First entry of every (crop, region), for crops named by model classes
+        self.regional = {}
+        for row, (crop, region) in enumerate(zip(self.crops.tolist(), self.region_codes.tolist())):
+            self.regional.setdefault((crop, self.region_names[region]), row)
+
+        digest = hashlib.sha1()
+        for column in (self.name_list, self.crops.tolist(), self.region_names, self.season_names):
+            digest.update('\0'.join(column).encode('utf-8'))
+        for array in (self.region_codes, self.season_codes, self.duration, self.market_price,
+                      self.yield_range, self.bounds):
+            digest.update(np.ascontiguousarray(array).tobytes())
+        self.version = digest.hexdigest()[:16]
+
+        self._memo = {}  # Row lookups and static fields, valid for this catalog's lifetime
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def from_frame(cls, frame, source):
+        """Catalog from a DataFrame with CSV_COLUMNS"""
+        frame = frame.copy()
+        frame.columns = [str(column).strip().lower() for column in frame.columns]
+        if 'crop' not in frame:
+            frame['crop'] = frame['name']
+        if 'region' not in frame:
+            frame['region'] = ''
+        missing = [column for column in CSV_COLUMNS if column not in frame]
+        if missing:
+            raise ValueError(f"Crop catalog is missing columns: {', '.join(missing)}")
+
+        text = {column: frame[column].fillna('').astype(str).str.strip()
+                for column in ['name', 'crop', 'region', 'season']}
+        numbers = frame[CSV_COLUMNS[4:]].apply(pd.to_numeric, errors='raise').to_numpy(dtype=np.float64)
+        if not np.isfinite(numbers).all():
+            raise ValueError('Crop catalog has missing numeric values')
+
+        text['name'], text['crop'] = text['name'].str.lower(), text['crop'].str.lower()
+        text['crop'] = text['crop'].where(text['crop'] != '', text['name'])
+        regions = pd.Categorical(text['region'].str.lower())
+        seasons = pd.Categorical(text['season'])
+        return cls(
+            names=text['name'].to_numpy(dtype=object),
+            crops=text['crop'].to_numpy(dtype=object),
+            regions=(regions.codes.astype(np.int16), regions.categories.tolist()),
+            seasons=(seasons.codes.astype(np.int16), seasons.categories.tolist()),
+            duration=numbers[:, 0].astype(np.int32),
+            market_price=numbers[:, 1],
+            yield_range=numbers[:, 2:4],
+            bounds=numbers[:, 4:].reshape(len(frame), len(CONDITIONS), 2),
+            source=source
+        )
+
+    @classmethod
+    def from_database(cls, database):
+        """Catalog from a CROP_DATABASE-style dict of crop name to attributes"""
+        rows = []
+        for name, info in database.items():
+            row = {'name': name, 'crop': name, 'region': '', 'season': info['season'],
+                   'duration_days': info['duration'], 'market_price': info['market_price'],
+                   'yield_min': info['yield_range'][0], 'yield_max': info['yield_range'][1]}
+            for condition in CONDITIONS:
+                row[f'{condition}_min'], row[f'{condition}_max'] = info['optimal_conditions'][condition]
+            rows.append(row)
+        return cls.from_frame(pd.DataFrame(rows, columns=CSV_COLUMNS), 'built-in')
+
+    @classmethod
+    def open(cls, path):
+        """Load a catalog from a .csv file or a saved .joblib file"""
+        if path.endswith('.csv'):
+            return cls.from_frame(pd.read_csv(path, dtype=str, keep_default_na=False), os.path.abspath(path))
+
+        payload = joblib.load(path, mmap_mode='r')
+        if payload.get('format') != CATALOG_FORMAT:
+            raise ValueError(f"Unsupported crop catalog format: {payload.get('format')}")
+        return cls(**payload['columns'], source=os.path.abspath(path))
+
+    def save(self, path):
+        """Write the catalog uncompressed so its arrays can be memory-mapped"""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        joblib.dump({
+            'format': CATALOG_FORMAT,
+            'columns': {
+                'names': self.names, 'crops': self.crops,
+                'regions': (self.region_codes, self.region_names),
+                'seasons': (self.season_codes, self.season_names),
+                'duration': self.duration, 'market_price': self.market_price,
+                'yield_range': self.yield_range, 'bounds': self.bounds
+            }
+        }, tmp_path)
+        os.replace(tmp_path, path)
+        return path
+
+    def region_key(self, region):
+        """Lower-cased region if some entry is specific to it, otherwise None (entries for every region)"""
+        if not region:
+            return None
+        region = region.strip().lower()
+        return region if region in self.region_names and region != '' else None
+
+    def row(self, name, region=None):
+        """Row of an entry name, or of the crop's entry for a region; None if unknown"""
+        region = self.region_key(region)
+        if region:
+            row = self.regional.get((name, region))
+            if row is not None:
+                return row
+        row = self.index.get(name)
+        return self.regional.get((name, '')) if row is None else row
+
+    def class_rows(self, classes, region=None, default=None):
+        """Rows for a sequence of crop names (model classes), unknown names mapped to default's row"""
+        region = self.region_key(region)
+        key = ('class_rows', tuple(classes), region, default)
+        rows = self._memo.get(key)
+        if rows is None:
+            fallback = self.row(default) if default is not None else None
+            rows = np.array([self.row(crop, region) for crop in classes], dtype=object)
+            rows[rows == None] = 0 if fallback is None else fallback  # noqa: E711
+            rows = self._memo[key] = rows.astype(np.intp)
+        return rows
+
+    def region_rows(self, region):
+        """Rows of the entries for one region plus those valid in every region"""
+        region = self.region_key(region) or ''
+        key = ('region_rows', region)
+        rows = self._memo.get(key)
+        if rows is None:
+            wanted = [code for code, name in enumerate(self.region_names) if name in ('', region)]
+            rows = self._memo[key] = np.flatnonzero(np.isin(self.region_codes, wanted))
+        return rows
+
+    def static_fields(self, row):
+        """Season, duration and price of a row, as shared in every recommendation of it"""
+        key = ('static', row)
+        fields = self._memo.get(key)
+        if fields is None:
+            fields = self._memo[key] = {
+                'season': self.season_names[self.season_codes[row]],
+                'duration_days': int(self.duration[row]),
+                'market_price_per_quintal': plain_number(self.market_price[row])
+            }
+        return fields
+
+    def record(self, row):
+        """One entry in the CROP_DATABASE layout"""
+        return {
+            'optimal_conditions': {condition: [plain_number(bound) for bound in self.bounds[row, i]]
+                                   for i, condition in enumerate(CONDITIONS)},
+            'season': self.season_names[self.season_codes[row]],
+            'duration': int(self.duration[row]),
+            'yield_range': [plain_number(bound) for bound in self.yield_range[row]],
+            'market_price': plain_number(self.market_price[row]),
+            'crop': self.crops[row],
+            'region': self.region_names[self.region_codes[row]]
+        }
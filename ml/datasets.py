@@ -0,0 +1,177 @@
+# Training Dataset Loader
+# Reads real soil and yield records from CSV or Parquet in chunks into compact typed columns
+# (float32 features and yield, categorical crop labels), validating every chunk on the way.
+#
+# The forests need their training set in memory, so a file with more than max_rows valid rows
+# is reservoir-sampled while it streams through: memory stays bounded by max_rows, whatever
+# the size of the file, and every valid row has the same chance of being kept.
+
+import os
+
+import numpy as np
+import pandas as pd
+
+DATASET_FORMATS = {'.csv': 'csv', '.parquet': 'parquet', '.pq': 'parquet'}
+LABEL_COLUMN = 'label'
+YIELD_COLUMN = 'yield'
+
+class DatasetError(ValueError):
+    """A dataset that cannot be trained on: unreadable, missing columns or too many bad rows"""
+
+def dataset_format(path):
+    """'csv' or 'parquet' from the file extension"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in DATASET_FORMATS:
+        raise DatasetError(f"Unsupported dataset file type '{extension}', expected .csv or .parquet")
+    return DATASET_FORMATS[extension]
+
+def read_header(path):
+    """Column names of a dataset file without reading its rows"""
+    if dataset_format(path) == 'parquet':
+        import pyarrow.parquet as pq
+
+        return list(pq.ParquetFile(path).schema_arrow.names)
+    return list(pd.read_csv(path, nrows=0).columns)
+
+def resolve_columns(names, feature_columns, aliases=None):
+    """Map file column names to training columns, matching case-insensitively and through aliases"""
+    wanted = {name.lower(): name for name in feature_columns + [LABEL_COLUMN, YIELD_COLUMN]}
+    wanted.update((alias.lower(), target) for alias, target in (aliases or {}).items())
+
+    mapping = {}
+    for name in names:
+        target = wanted.get(str(name).strip().lower())
+        if target is not None and target not in mapping.values():
+            mapping[name] = target
+
+    missing = [name for name in feature_columns + [LABEL_COLUMN, YIELD_COLUMN] if name not in mapping.values()]
+    if missing:
+        raise DatasetError(f"Dataset is missing columns: {', '.join(missing)}")
+    return mapping
+
+def iter_chunks(path, mapping, chunk_rows):
+    """Yield DataFrames of at most chunk_rows rows holding only the mapped columns, renamed"""
+    if dataset_format(path) == 'parquet':
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows, columns=list(mapping)):
+            yield batch.to_pandas().rename(columns=mapping)
+    else:
+        # Labels stay strings; numeric columns are parsed by the C reader and coerced below
+        label_source = next(name for name, target in mapping.items() if target == LABEL_COLUMN)
+        for frame in pd.read_csv(path, usecols=list(mapping), chunksize=chunk_rows,
+                                 dtype={label_source: str}, skipinitialspace=True):
+            yield frame.rename(columns=mapping)
+
+def validate_chunk(frame, feature_ranges):
+    """Typed arrays of the valid rows of one chunk and the number of rows rejected per reason"""
+    columns = list(feature_ranges) + [YIELD_COLUMN]
+    values = np.column_stack([pd.to_numeric(frame[name], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+                              for name in columns])
+    labels = frame[LABEL_COLUMN].astype('string').str.strip().str.lower().fillna('')
+
+    missing = ~np.isfinite(values).all(axis=1) | (labels == '').to_numpy()
+    low = np.array([low for low, _ in feature_ranges.values()] + [0.0])
+    high = np.array([high for _, high in feature_ranges.values()] + [np.inf])
+    out_of_range = ~missing & ((values < low) | (values > high)).any(axis=1)
+
+    valid = ~(missing | out_of_range)
+    return (values[valid, :-1].astype(np.float32), labels.to_numpy(dtype=object)[valid],
+            values[valid, -1].astype(np.float32),
+            {'missing_value': int(missing.sum()), 'out_of_range': int(out_of_range.sum())})
+
+class Reservoir:
+    """Uniform sample of at most capacity rows from a stream of row blocks (Algorithm R)
+
+    Each block is a tuple of equally long arrays, one per column. An earlier sample can be
+    resumed by passing its rows and the number of stream rows it was drawn from.
+    """
+
+    def __init__(self, capacity, random_state=42, rows=None, seen=0):
+        self.capacity = capacity
+        self.rng = np.random.default_rng(random_state)
+        self.blocks = [tuple(np.array(column) for column in rows)] if rows is not None else []
+        self.seen = seen
+
+    def add(self, *columns):
+        n_rows = len(columns[0])
+        room = max(min(self.capacity - self.seen, n_rows), 0)
+        if room:
+            self.blocks.append(tuple(column[:room] for column in columns))
+
+        # Once full, row i of the stream replaces a random slot with probability capacity / (i + 1)
+        if room < n_rows:
+            self.blocks = [self.rows()]
+            positions = self.seen + np.arange(room, n_rows)
+            slots = self.rng.integers(0, positions + 1)
+            chosen = np.flatnonzero(slots < self.capacity)
+            slots, chosen = slots[chosen], chosen + room
+            for sample, column in zip(self.blocks[0], columns):
+                sample[slots] = column[chosen]
+        self.seen += n_rows
+
+    def rows(self):
+        """The sampled columns"""
+        if len(self.blocks) == 1:
+            return self.blocks[0]
+        return tuple(np.concatenate(parts) for parts in zip(*self.blocks))
+
+def load_dataset(path, feature_ranges, aliases=None, chunk_rows=100_000, max_rows=None,
+                 max_reject_fraction=0.1, min_label_rows=10, random_state=42):
+    """Load a training dataset shaped like create_synthetic_dataset's; returns (DataFrame, report)"""
+    if not os.path.isfile(path):
+        raise DatasetError(f"Dataset not found: {path}")
+    feature_columns = list(feature_ranges)
+    mapping = resolve_columns(read_header(path), feature_columns, aliases)
+
+    label_codes = {}
+    rejected = {'missing_value': 0, 'out_of_range': 0}
+    rows_read = 0
+    reservoir = Reservoir(max_rows or np.iinfo(np.int64).max, random_state)
+
+    for frame in iter_chunks(path, mapping, chunk_rows):
+        features, labels, yields, chunk_rejected = validate_chunk(frame, feature_ranges)
+        rows_read += len(frame)
+        for reason, count in chunk_rejected.items():
+            rejected[reason] += count
+
+        codes = np.array([label_codes.setdefault(label, len(label_codes)) for label in labels], dtype=np.int32)
+        reservoir.add(features, codes, yields)
+
+    n_rejected = sum(rejected.values())
+    if not reservoir.seen:
+        raise DatasetError(f"Dataset has no valid rows: {path}")
+    if n_rejected > rows_read * max_reject_fraction:
+        raise DatasetError(f"{n_rejected} of {rows_read} rows are invalid ({rejected}), "
+                           f"more than the allowed {max_reject_fraction:.0%}")
+
+    # Crops with too few rows cannot be split into stratified train and test sets
+    features, labels, yields = reservoir.rows()
+    categories = np.array(list(label_codes), dtype=object)
+    counts = np.bincount(labels, minlength=len(categories))
+    rare = counts < min_label_rows
+    keep = ~rare[labels]
+    if not keep.any() or (~rare).sum() < 2:
+        raise DatasetError(f"Dataset needs at least two crops with {min_label_rows} or more rows")
+
+    # Renumber the kept labels so the categories are sorted like LabelEncoder's classes
+    kept_categories = np.sort(categories[~rare])
+    remap = np.full(len(categories), -1, dtype=np.int32)
+    remap[~rare] = np.searchsorted(kept_categories, categories[~rare])
+
+    df = pd.DataFrame({name: features[keep, i] for i, name in enumerate(feature_columns)})
+    df[LABEL_COLUMN] = pd.Categorical.from_codes(remap[labels[keep]], categories=kept_categories)
+    df[YIELD_COLUMN] = yields[keep]
+
+    report = {
+        'path': os.path.abspath(path),
+        'format': dataset_format(path),
+        'rows_read': rows_read,
+        'rows_rejected': rejected,
+        'rows_valid': reservoir.seen,
+        'rows_used': len(df),
+        'sampled': reservoir.seen > reservoir.capacity,
+        'dropped_labels': {str(label): int(count) for label, count in zip(categories[rare], counts[rare])},
+        'labels': kept_categories.tolist()
+    }
+    return df, report
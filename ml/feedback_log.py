@@ -0,0 +1,81 @@
+# Feedback Log
+# Append-only binary log of observed outcomes: the seven request features, the crop actually
+# grown and its actual yield. Records are fixed-size, so the log is read back as a
+# memory-mapped NumPy array and any range of it costs only the records in that range.
+#
+# Each append is a single write on a file opened with O_APPEND, so concurrent appends from
+# several gunicorn workers never interleave; a torn record at the end is ignored on read.
+
+import os
+import threading
+import time
+
+import numpy as np
+
+MAGIC = b'MLFDBK01'
+
+# 64 bytes per record; yield is NaN when only the crop was reported
+RECORD_DTYPE = np.dtype([
+    ('timestamp', '<f8'),
+    ('features', '<f4', (7,)),
+    ('crop', 'S24'),
+    ('yield', '<f4')
+])
+HEADER_SIZE = RECORD_DTYPE.itemsize  # Magic, zero padded to one record
+MAX_CROP_BYTES = RECORD_DTYPE['crop'].itemsize
+
+class FeedbackLog:
+    """Fixed-size outcome records appended to one file"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _open_for_append(self):
+        if not os.path.exists(self.path):
+            # Create the file with its header in place, so no process ever appends to a headerless log
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            temp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(MAGIC.ljust(HEADER_SIZE, b'\0'))
+            try:
+                os.link(temp_path, self.path)
+            except FileExistsError:
+                pass
+            finally:
+                os.remove(temp_path)
+        return os.open(self.path, os.O_WRONLY | os.O_APPEND)
+
+    def append(self, features, crops, yields):
+        """Append one record per row of features; returns the number of records in the log"""
+        records = np.zeros(len(crops), dtype=RECORD_DTYPE)
+        records['timestamp'] = time.time()
+        records['features'] = features
+        records['crop'] = [crop.encode('utf-8') for crop in crops]
+        records['yield'] = yields
+
+        with self._lock:
+            fd = self._open_for_append()
+            try:
+                os.write(fd, records.tobytes())
+                return (os.fstat(fd).st_size - HEADER_SIZE) // RECORD_DTYPE.itemsize
+            finally:
+                os.close(fd)
+
+    def __len__(self):
+        if not os.path.exists(self.path):
+            return 0
+        return max(os.path.getsize(self.path) - HEADER_SIZE, 0) // RECORD_DTYPE.itemsize
+
+    def read(self, start=0, stop=None):
+        """Records [start, stop) as a read-only memory-mapped structured array"""
+        count = len(self)
+        stop = count if stop is None else min(stop, count)
+        if start >= stop:
+            return np.zeros(0, dtype=RECORD_DTYPE)
+
+        with open(self.path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"Not a feedback log: {self.path}")
+        return np.memmap(self.path, dtype=RECORD_DTYPE, mode='r',
+                         offset=HEADER_SIZE + start * RECORD_DTYPE.itemsize, shape=(stop - start,))
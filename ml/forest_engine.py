@@ -0,0 +1,178 @@
+# Compiled Random Forest Inference Engine
+# Flattens trained scikit-learn forests into contiguous NumPy arrays and
+# traverses every tree at once, avoiding per-tree Python and joblib overhead
+
+import numpy as np
+from sklearn import __version__ as sklearn_version
+
+# scikit-learn 1.4+ stores class fractions in tree_.value and returns them
+# unchanged; older releases store counts and normalise them in predict_proba
+_NORMALIZE_CLASS_VALUES = tuple(int(part) for part in sklearn_version.split('.')[:2]) < (1, 4)
+
+# Largest relative difference from sklearn accepted for compacted (float32) forests
+COMPACT_PARITY_TOLERANCE = 1e-6
+
+class CompiledForest:
+    """Random forest flattened into node arrays shared by all of its trees"""
+
+    def __init__(self, feature, threshold, children, value, roots, max_depth, is_classifier):
+        self.feature = feature            # (n_nodes,) split feature, 0 at leaves
+        self.threshold = threshold        # (n_nodes,) split threshold
+        self.children = children          # (n_nodes, 2) left/right child, leaves point to themselves
+        self.value = value                # (n_nodes, n_values) leaf outputs
+        self.roots = roots                # (n_trees,) index of each tree's root node
+        self.max_depth = max_depth
+        self.is_classifier = is_classifier
+
+    @classmethod
+    def from_sklearn(cls, forest):
+        """Compile a fitted RandomForestClassifier or RandomForestRegressor"""
+        is_classifier = hasattr(forest, 'classes_')
+        features, thresholds, children, values, roots = [], [], [], [], []
+        offset = 0
+        max_depth = 0
+
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            node_ids = np.arange(tree.node_count)
+            is_leaf = tree.children_left == -1
+
+            # Leaves loop back to themselves so extra traversal steps are no-ops
+            left = np.where(is_leaf, node_ids, tree.children_left) + offset
+            right = np.where(is_leaf, node_ids, tree.children_right) + offset
+
+            if is_classifier:
+                value = tree.value[:, 0, :forest.n_classes_]
+                if _NORMALIZE_CLASS_VALUES:
+                    # Same normalisation as DecisionTreeClassifier.predict_proba
+                    normalizer = value.sum(axis=1)[:, np.newaxis]
+                    normalizer[normalizer == 0.0] = 1.0
+                    value = value / normalizer
+            else:
+                value = tree.value[:, :, 0]
+
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(tree.threshold)
+            children.append(np.stack([left, right], axis=1))
+            values.append(value)
+            roots.append(offset)
+            offset += tree.node_count
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            feature=np.ascontiguousarray(np.concatenate(features), dtype=np.intp),
+            threshold=np.ascontiguousarray(np.concatenate(thresholds), dtype=np.float64),
+            children=np.ascontiguousarray(np.concatenate(children), dtype=np.intp),
+            value=np.ascontiguousarray(np.concatenate(values), dtype=np.float64),
+            roots=np.asarray(roots, dtype=np.intp),
+            max_depth=max_depth,
+            is_classifier=is_classifier
+        )
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for array in (self.feature, self.threshold, self.children, self.value, self.roots))
+
+    @property
+    def is_compact(self):
+        return self.value.dtype == np.float32
+
+    def compact(self):
+        """Copy with float32 thresholds and leaf values and int32 indices, about half the memory.
+
+        Thresholds are rounded down to the nearest float32, which keeps every split decision
+        identical for float32 inputs; float32 leaf values change outputs by about 1e-7.
+        """
+        threshold = self.threshold.astype(np.float32)
+        rounded_up = threshold > self.threshold
+        threshold[rounded_up] = np.nextafter(threshold[rounded_up], np.float32(-np.inf))
+
+        return CompiledForest(
+            feature=self.feature.astype(np.int32),
+            threshold=threshold,
+            children=self.children.astype(np.int32),
+            value=self.value.astype(np.float32),
+            roots=self.roots.astype(np.int32),
+            max_depth=self.max_depth,
+            is_classifier=self.is_classifier
+        )
+
+    def apply(self, X):
+        """Return the leaf reached in every tree for every row, shape (n_trees, n_samples)"""
+        # sklearn trees compare float32 inputs against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        if not np.isfinite(X).all():
+            raise ValueError('Input contains NaN or infinity')
+
+        n_samples, n_features = X.shape
+        X_flat = X.ravel()
+        row_offset = np.arange(n_samples, dtype=np.intp) * n_features
+
+        node = np.repeat(self.roots[:, np.newaxis], n_samples, axis=1)
+        for _ in range(self.max_depth):
+            go_right = X_flat[row_offset + self.feature[node]] > self.threshold[node]
+            node = self.children[node, go_right.view(np.int8)]
+
+        return node
+
+    def _accumulate(self, X):
+        """Sum leaf values over trees in estimator order, as sklearn does"""
+        leaves = self.apply(X)
+        total = np.zeros((leaves.shape[1], self.value.shape[1]), dtype=np.float64)
+        for tree_leaves in leaves:
+            total += self.value[tree_leaves]
+        total /= self.n_trees
+        return total
+
+    def predict_proba(self, X):
+        """Class probabilities, identical to RandomForestClassifier.predict_proba"""
+        return self._accumulate(X)
+
+    def predict(self, X):
+        """Predictions, identical to RandomForestRegressor.predict"""
+        if self.is_classifier:
+            return np.argmax(self._accumulate(X), axis=1)
+        return self._accumulate(X)[:, 0]
+
+def verify_parity(forest, compiled, X, tolerance=0.0):
+    """Check the compiled engine reproduces the sklearn forest on X, bit for bit unless a tolerance is given"""
+    if compiled.is_classifier:
+        expected, actual = forest.predict_proba(X), compiled.predict_proba(X)
+    else:
+        expected, actual = forest.predict(X), compiled.predict(X)
+
+    if tolerance:
+        return bool(np.max(np.abs(expected - actual) / np.maximum(np.abs(expected), 1.0)) <= tolerance)
+    return np.array_equal(expected, actual)
+
+def parity_probe(n_features, n_samples=256, random_state=0):
+    """Random standardised inputs for parity checks, spanning the scaled feature space"""
+    rng = np.random.RandomState(random_state)
+    return rng.normal(0, 1.5, size=(n_samples, n_features))
+
+if __name__ == '__main__':
+    # Parity check of the compiled engines against the forests in a saved model bundle
+    import sys
+    import joblib
+
+    path = sys.argv[1] if len(sys.argv) > 1 else 'model_bundle.joblib'
+    n_samples = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    payload = joblib.load(path, mmap_mode='r')
+    failed = False
+    for name in ['crop', 'yield']:
+        forest = payload[f'{name}_model']
+        X = parity_probe(forest.n_features_in_, n_samples)
+        # Freshly compiled forests must match exactly, the stored (possibly compacted) ones within tolerance
+        for label, compiled in [('compiled', CompiledForest.from_sklearn(forest)), ('stored', payload[f'{name}_engine'])]:
+            if compiled is None:
+                continue
+            tolerance = COMPACT_PARITY_TOLERANCE if compiled.is_compact else 0.0
+            status = 'OK' if verify_parity(forest, compiled, X, tolerance) else 'MISMATCH'
+            failed = failed or status != 'OK'
+            print(f"{name} model, {label}{' (float32)' if compiled.is_compact else ''}: {compiled.n_trees} trees, "
+                  f"{len(compiled.feature)} nodes, depth {compiled.max_depth}, parity on {n_samples} rows: {status}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,105 @@
+# Forest Size Tuner
+# Sweeps tree count and depth for the crop and yield forests, measuring accuracy, inference
+# latency and model size, and picks the smallest pair within an accuracy tolerance.
+#
+# One forest is fitted per depth at the largest tree count; smaller counts are its first
+# n trees. scikit-learn draws each tree's seed in order from random_state, so those trees
+# are exactly what a forest fitted with that n_estimators would grow.
+
+import copy
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+from sklearn.metrics import accuracy_score, r2_score
+
+from forest_engine import CompiledForest
+
+def truncate_forest(forest, n_estimators):
+    """The same forest restricted to its first n_estimators trees"""
+    truncated = copy.copy(forest)
+    truncated.estimators_ = forest.estimators_[:n_estimators]
+    truncated.n_estimators = n_estimators
+    return truncated
+
+def count_nodes(forest):
+    return sum(estimator.tree_.node_count for estimator in forest.estimators_)
+
+def median_seconds(func, X, repeats):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func(X)
+        samples.append(time.perf_counter() - start)
+    return float(np.median(samples))
+
+def measure_latency(crop_model, yield_model, X, single_repeats=30, batch_rows=1000):
+    """Median single-row and batch latency of both forests, in milliseconds"""
+    row = X[:1]
+    batch = X[:batch_rows]
+    crop_engine = CompiledForest.from_sklearn(crop_model)
+    yield_engine = CompiledForest.from_sklearn(yield_model)
+
+    def sklearn_pass(X):
+        crop_model.predict_proba(X)
+        yield_model.predict(X)
+
+    def compiled_pass(X):
+        crop_engine.predict_proba(X)
+        yield_engine.predict(X)
+
+    return {
+        'single_row_ms': round(median_seconds(sklearn_pass, row, single_repeats) * 1000, 3),
+        'compiled_single_row_ms': round(median_seconds(compiled_pass, row, single_repeats) * 1000, 3),
+        'batch_ms': round(median_seconds(sklearn_pass, batch, 5) * 1000, 3),
+        'batch_rows': len(batch),
+        'compiled_bytes': crop_engine.nbytes + yield_engine.nbytes
+    }
+
+def sweep(X_train, y_crop_train, y_yield_train, X_test, y_crop_test, y_yield_test,
+          n_estimators_grid, max_depth_grid, base_params, n_jobs=1):
+    """Fit and evaluate every (n_estimators, max_depth) pair; returns candidates with their models"""
+    max_estimators = max(n_estimators_grid)
+    params = dict(base_params, n_estimators=max_estimators)
+
+    fits = []
+    for depth in max_depth_grid:
+        fits.append((depth, RandomForestClassifier(**dict(params, max_depth=depth)), y_crop_train))
+        fits.append((depth, RandomForestRegressor(**dict(params, max_depth=depth)), y_yield_train))
+
+    # Tree building releases the GIL, so the forests grow side by side, one core each
+    with ThreadPoolExecutor(max_workers=max(1, n_jobs)) as executor:
+        for future in [executor.submit(model.fit, X_train, y) for _, model, y in fits]:
+            future.result()
+
+    forests = {}
+    for depth, model, _ in fits:
+        forests.setdefault(depth, []).append(model)
+
+    candidates = []
+    for depth, (crop_forest, yield_forest) in forests.items():
+        for n_estimators in sorted(n_estimators_grid):
+            crop_model = truncate_forest(crop_forest, n_estimators)
+            yield_model = truncate_forest(yield_forest, n_estimators)
+            candidate = {
+                'n_estimators': n_estimators,
+                'max_depth': depth,
+                'accuracy': float(accuracy_score(y_crop_test, crop_model.predict(X_test))),
+                'yield_r2': float(r2_score(y_yield_test, yield_model.predict(X_test))),
+                'nodes': count_nodes(crop_model) + count_nodes(yield_model)
+            }
+            candidate.update(measure_latency(crop_model, yield_model, X_test))
+            candidate['models'] = (crop_model, yield_model)
+            candidates.append(candidate)
+
+    return candidates
+
+def select_candidate(candidates, tolerance):
+    """Smallest candidate whose accuracy and yield R2 are within tolerance of the best ones"""
+    best_accuracy = max(candidate['accuracy'] for candidate in candidates)
+    best_r2 = max(candidate['yield_r2'] for candidate in candidates)
+    eligible = [candidate for candidate in candidates
+                if candidate['accuracy'] >= best_accuracy - tolerance
+                and candidate['yield_r2'] >= best_r2 - tolerance]
+    return min(eligible, key=lambda candidate: (candidate['nodes'], candidate['single_row_ms']))
@@ -0,0 +1,26 @@
+# Gunicorn configuration for the ML service
+# Pre-fork workers share the model bundle loaded by the master (see wsgi.py)
+
+import gc
+import multiprocessing
+import os
+
+bind = os.environ.get('ML_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('ML_WORKERS', multiprocessing.cpu_count()))
+threads = int(os.environ.get('ML_THREADS', '2'))
+worker_class = 'gthread' if threads > 1 else 'sync'
+timeout = int(os.environ.get('ML_TIMEOUT', '60'))
+graceful_timeout = int(os.environ.get('ML_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.environ.get('ML_KEEPALIVE', '5'))
+max_requests = int(os.environ.get('ML_MAX_REQUESTS', '0'))
+max_requests_jitter = max_requests // 10
+
+# Load models in the master before forking
+preload_app = True
+
+def when_ready(server):
+    """Move everything allocated at startup out of the collector's reach, so that
+    garbage collection in the workers does not touch (and copy) the shared pages"""
+    gc.collect()
+    gc.freeze()
+    server.log.info(f"ML service master ready: {workers} workers x {threads} threads, timeout {timeout}s")
@@ -0,0 +1,55 @@
+# Incremental Forest Updates
+# Grows trained forests with a few new trees fit on recent feedback mixed with a replay sample
+# of older rows, then retires the same number of the oldest trees, so the forest size stays
+# fixed and an update costs time in proportion to the new data rather than the full history.
+#
+# Replay rows keep every crop class present in each update: a classifier tree fit without
+# some class would disagree with the others about the shape of its probability output.
+# Replay rows flagged as holdout are never fit; they measure accuracy before and after.
+
+import copy
+
+import numpy as np
+from sklearn.metrics import accuracy_score, r2_score
+
+def replay_sample(X, labels, yields, holdout, capacity, random_state=42):
+    """Random sample of at most capacity rows in which every label has a training (non-holdout) row"""
+    rng = np.random.default_rng(random_state)
+    order = rng.permutation(len(labels))[:capacity]
+    training = np.flatnonzero(~holdout)
+    _, first_of_label = np.unique(labels[training], return_index=True)
+    index = np.union1d(order, training[first_of_label])
+    return (np.array(X[index], dtype=np.float32), np.array(labels[index], dtype=np.int32),
+            np.array(yields[index], dtype=np.float32), np.array(holdout[index], dtype=bool))
+
+def pick_replay_rows(labels, n_rows, n_classes, rng):
+    """Indices of about n_rows random replay rows, topped up with one row of every missing class"""
+    picked = rng.permutation(len(labels))[:n_rows]
+    missing = np.setdiff1d(np.arange(n_classes), labels[picked])
+    return np.concatenate([picked] + [np.flatnonzero(labels == label)[:1] for label in missing])
+
+def grow_forest(forest, X, y, n_trees, random_state, n_jobs=None):
+    """Copy of forest with n_trees new trees fit on (X, y) by warm start and its n_trees oldest retired"""
+    grown = copy.copy(forest)
+    grown.estimators_ = list(forest.estimators_)  # The old trees are shared, never modified
+    grown.set_params(warm_start=True, n_estimators=len(forest.estimators_) + n_trees,
+                     random_state=random_state, n_jobs=n_jobs)
+    grown.fit(X, y)
+
+    if hasattr(forest, 'classes_') and not np.array_equal(grown.classes_, forest.classes_):
+        raise ValueError('Incremental update data does not cover every crop class')
+
+    grown.estimators_ = grown.estimators_[n_trees:]
+    grown.set_params(warm_start=False, n_estimators=len(grown.estimators_), n_jobs=None)
+    return grown
+
+def evaluate(crop_model, yield_model, X, labels, yields):
+    """Accuracy on rows with a known label and yield R2 on rows with a yield, None when too few"""
+    known = labels >= 0
+    measured = np.isfinite(yields)
+    return {
+        'rows': len(labels),
+        'accuracy': float(accuracy_score(labels[known], crop_model.predict(X[known]))) if known.any() else None,
+        'yield_r2': float(r2_score(yields[measured], yield_model.predict(X[measured])))
+        if measured.sum() >= 2 else None
+    }
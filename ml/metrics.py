@@ -0,0 +1,108 @@
+# Service Metrics
+# Minimal thread-safe Prometheus registry: labelled counters and latency histograms,
+# rendered in the Prometheus text exposition format
+
+import bisect
+import threading
+import time
+
+# Latency buckets in seconds, from 50 microseconds to 2.5 seconds
+DEFAULT_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+                   0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+def _format_labels(labels, extra=None):
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{str(value)}"' for key, value in pairs) + '}'
+
+class MetricsRegistry:
+    """Counters and histograms keyed by metric name and label set; recording is a no-op when disabled"""
+
+    def __init__(self, enabled=True, buckets=DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._help = {}
+        self._counters = {}    # name -> {labels: value}
+        self._histograms = {}  # name -> {labels: [bucket counts..., sum, count]}
+
+    def describe(self, name, kind, help_text):
+        """Register HELP/TYPE lines for a metric"""
+        self._help[name] = (kind, help_text)
+
+    def inc(self, name, amount=1, **labels):
+        if not self.enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        if not self.enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            counts = series.get(key)
+            if counts is None:
+                counts = series[key] = [0] * (len(self.buckets) + 3)
+            counts[index] += 1
+            counts[-2] += value
+            counts[-1] += 1
+
+    def stage(self, name, start, histogram='ml_predict_stage_seconds'):
+        """Record the time since start under a stage label and return the new start time"""
+        if not self.enabled:
+            return start
+        now = time.perf_counter()
+        self.observe(histogram, now - start, stage=name)
+        return now
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render(self, samples=()):
+        """Prometheus text format; samples are (name, kind, help, value, labels) read by the caller"""
+        lines = []
+        with self._lock:
+            counters = {name: dict(series) for name, series in self._counters.items()}
+            histograms = {name: {key: list(counts) for key, counts in series.items()}
+                          for name, series in self._histograms.items()}
+
+        def header(name, kind, help_text):
+            kind, help_text = self._help.get(name, (kind, help_text))
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+
+        for name in sorted(counters):
+            header(name, 'counter', name)
+            for labels, value in sorted(counters[name].items()):
+                lines.append(f'{name}{_format_labels(labels)} {value}')
+
+        for name in sorted(histograms):
+            header(name, 'histogram', name)
+            for labels, counts in sorted(histograms[name].items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{_format_labels(labels, ("le", bound))} {cumulative}')
+                cumulative += counts[len(self.buckets)]
+                lines.append(f'{name}_bucket{_format_labels(labels, ("le", "+Inf"))} {cumulative}')
+                lines.append(f'{name}_sum{_format_labels(labels)} {counts[-2]}')
+                lines.append(f'{name}_count{_format_labels(labels)} {counts[-1]}')
+
+        seen = set()
+        for name, kind, help_text, value, labels in samples:
+            if value is None:
+                continue
+            if name not in seen:
+                header(name, kind, help_text)
+                seen.add(name)
+            lines.append(f'{name}{_format_labels(sorted(labels.items()))} {value}')
+
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,96 @@
+# Request Micro-Batcher
+# Coalesces concurrent single-row predictions into one vectorized model pass
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+class MicroBatcher:
+    """Background thread that collects queued items for a short window and scores them together"""
+
+    def __init__(self, score_batch, window_ms=2.0, max_batch_size=64, timeout_seconds=30.0):
+        self.score_batch = score_batch  # callable(list of items) -> list of results, same order
+        self.window_ms = window_ms
+        self.max_batch_size = max_batch_size
+        self.timeout_seconds = timeout_seconds
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self.batches = 0
+        self.rows = 0
+        self.largest_batch = 0
+        self.errors = 0
+
+    def submit(self, item):
+        """Queue one item and block until the batch containing it has been scored"""
+        self._ensure_started()
+        future = Future()
+        self._queue.put((item, future))
+        return future.result(timeout=self.timeout_seconds)
+
+    def _ensure_started(self):
+        # Threads do not survive fork, so each worker process starts its own
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._queue = queue.Queue()
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        window = self.window_ms / 1000.0
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + window
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    if remaining > 0:
+                        batch.append(self._queue.get(timeout=remaining))
+                    else:
+                        # Window over: still take whatever is already waiting
+                        batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._process(batch)
+
+    def _process(self, batch):
+        items = [item for item, _ in batch]
+        try:
+            results = self.score_batch(items)
+        except Exception as e:
+            self.errors += 1
+            if len(batch) == 1:
+                batch[0][1].set_exception(e)
+                return
+            # Score the items one at a time, so only the items that fail get an error
+            for item, future in batch:
+                try:
+                    future.set_result(self.score_batch([item])[0])
+                except Exception as item_error:
+                    future.set_exception(item_error)
+        else:
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+        self.batches += 1
+        self.rows += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+
+    def stats(self):
+        """Batching settings and counters"""
+        return {
+            'window_ms': self.window_ms,
+            'max_batch_size': self.max_batch_size,
+            'batches': self.batches,
+            'rows': self.rows,
+            'mean_batch_size': round(self.rows / self.batches, 2) if self.batches else 0.0,
+            'largest_batch': self.largest_batch,
+            'queued': self._queue.qsize(),
+            'errors': self.errors
+        }
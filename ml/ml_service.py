@@ -1,36 +1,99 @@
 # AI Crop Recommendation ML Service
 # Flask-based machine learning service for crop predictions
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 import pandas as pd
 import numpy as np
 from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder, StandardScaler
-from sklearn.metrics import accuracy_score, classification_report
+from sklearn.metrics import accuracy_score, classification_report, r2_score
 import joblib
+import json
+from joblib import effective_n_jobs
 import os
 import logging
+import math
+import multiprocessing
+import shutil
+import threading
+import time
+import uuid
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
 import warnings
+from climate_tiles import ClimateTiles
+from crop_catalog import CropCatalog, top_k_indices
+from datasets import DatasetError, Reservoir, dataset_format, load_dataset, read_header, resolve_columns
+from feedback_log import MAX_CROP_BYTES, FeedbackLog
+from forest_engine import COMPACT_PARITY_TOLERANCE, CompiledForest, parity_probe, verify_parity
+from forest_tuner import select_candidate, sweep
+from incremental import evaluate, grow_forest, pick_replay_rows, replay_sample
+from prediction_cache import PredictionCache
+from shadow import ShadowScorer
+from profiler import SORT_KEYS, SamplingProfiler, profile_call
+from micro_batcher import MicroBatcher
+from metrics import MetricsRegistry
+from suitability_grid import SuitabilityGrid
 warnings.filterwarnings('ignore')
 
+try:
+    import fcntl  # Unix only; without it the bundle writer lock applies within one process
+except ImportError:
+    fcntl = None
+
+try:
+    import orjson  # Optional: several times faster than the json module for response bodies
+except ImportError:
+    orjson = None
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider that serializes with orjson; NaN and infinity become null. Keys are
+    sorted like Flask's default provider does, unless sort_keys is turned off"""
+
+    def dumps(self, obj, **kwargs):
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+
 # Initialize Flask app
 app = Flask(__name__)
 CORS(app)  # Enable CORS for cross-origin requests
+if orjson is not None and os.environ.get('ML_ORJSON', '1') == '1':
+    app.json = OrjsonProvider(app)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Global variables for models
-crop_model = None
-yield_model = None
-label_encoder = None
-scaler = None
+# Everything needed to serve predictions, built completely before it is installed
+ModelBundle = namedtuple('ModelBundle', [
+    'crop_model', 'yield_model', 'label_encoder', 'scaler', 'accuracy',
+    'trained_at', 'generation', 'crop_engine', 'yield_engine', 'metadata', 'replay'
+], defaults=[None])
+
+# Global variables for models: the active bundle is replaced by a single assignment,
+# so a request that reads it once never mixes models from different trainings
+model_bundle = None
 model_version = "1.2.0"
-model_accuracy = 0.0
+model_generation = 0  # Incremented whenever the models change; tags cached predictions
+_install_lock = threading.Lock()
+startup_info = {}  # Cold-start readout filled in by init_models
+_bundle_state = {'mtime': None, 'checked_at': 0.0}  # Bundle file the active models came from
+suitability_grid = None  # Lookup tables behind /predict/fast, see load_suitability_grid
+_catalog_state = {'mtime': None, 'checked_at': 0.0}  # Catalog file the active crop catalog came from
+climate_tiles = None  # Location raster that fills missing features, see load_climate_tiles
+shadow_scorer = None  # Candidate bundle compared against the active one, see /shadow/load
+
+# Background retraining jobs started by this process, one at a time across all worker processes
+# (see acquire_bundle_lock), each in a fresh worker process
+retrain_jobs = {}
+_retrain_lock = threading.Lock()
+MAX_RETAINED_JOBS = 20
 
 # Crop database with characteristics
 CROP_DATABASE = {
@@ -92,50 +155,255 @@ CROP_DATABASE = {
     }
 }
 
-def create_synthetic_dataset():
+# Model input features: training column names and the matching request keys
+FEATURE_COLUMNS = ['N', 'P', 'K', 'temperature', 'humidity', 'ph', 'rainfall']
+REQUEST_FEATURES = ['nitrogen', 'phosphorus', 'potassium', 'temperature', 'humidity', 'ph', 'rainfall']
+
+# Values substituted when a request omits a feature
+FEATURE_DEFAULTS = {
+    'nitrogen': 50, 'phosphorus': 40, 'potassium': 35,
+    'temperature': 25, 'humidity': 70, 'ph': 6.5, 'rainfall': 800
+}
+
+# Climate and soil raster built by climate_tiles.py: requests with "lat" and "lon" take missing
+# features from it (bilinear between grid points unless ML_CLIMATE_TILES_INTERPOLATE=0)
+CLIMATE_TILES_PATH = os.environ.get('ML_CLIMATE_TILES')
+CLIMATE_TILES_INTERPOLATE = os.environ.get('ML_CLIMATE_TILES_INTERPOLATE', '1') == '1'
+
+# Cache key precision per feature, well below what matters agronomically
+FEATURE_QUANTA = [1.0, 1.0, 1.0, 0.1, 0.5, 0.01, 1.0]
+
+# Plausible range of every training column; dataset rows outside them are rejected
+FEATURE_RANGES = {
+    'N': (0, 1000), 'P': (0, 1000), 'K': (0, 2000), 'temperature': (-20, 60),
+    'humidity': (0, 100), 'ph': (0, 14), 'rainfall': (0, 15000)
+}
+# Other column names accepted in dataset files: the request field names, and crop for label
+DATASET_ALIASES = dict(zip(REQUEST_FEATURES, FEATURE_COLUMNS), crop='label')
+
+# Optimal-condition keys with their penalty slope and minimum factor,
+# in the order calculate_yield_factor applies them
+CONDITION_RULES = [
+    ('ph', 0.2, 0.3),
+    ('temp', 0.05, 0.2),
+    ('humidity', 0.02, 0.3),
+    ('rainfall', 0.001, 0.2)
+]
+
+# CROP_DATABASE compiled into arrays for the synthetic dataset; CROP_BOUNDS holds the
+# optimal (low, high) range of each condition, shape (n_crops, n_conditions, 2)
+CROP_NAMES = np.array(list(CROP_DATABASE.keys()))
+CROP_BOUNDS = np.array([
+    [CROP_DATABASE[crop]['optimal_conditions'][key] for key, _, _ in CONDITION_RULES]
+    for crop in CROP_NAMES
+], dtype=np.float64)
+CROP_BASE_YIELD = np.array([np.mean(CROP_DATABASE[crop]['yield_range']) for crop in CROP_NAMES])
+CONDITION_SLOPES = np.array([slope for _, slope, _ in CONDITION_RULES])
+CONDITION_FLOORS = np.array([floor for _, _, floor in CONDITION_RULES])
+
+# Crop catalog behind ranking and /crops/database: a CSV or saved .joblib file (see
+# crop_catalog.py), or CROP_DATABASE when unset; a changed file is reloaded without a restart
+CROP_CATALOG_PATH = os.environ.get('ML_CROP_CATALOG')
+crop_catalog = CropCatalog.from_database(CROP_DATABASE)
+
+# /crops/database pages: default and largest page size, browser cache lifetime, cached pages
+CROP_PAGE_SIZE = 100
+MAX_CROP_PAGE_SIZE = 1000
+CROP_DATABASE_MAX_AGE = int(os.environ.get('ML_CROP_DATABASE_MAX_AGE', '300'))
+CROP_PAGE_CACHE_SIZE = 256
+_crop_pages = {}  # (catalog version, region, offset, limit) -> serialized page
+
+# Sections of a /predict response; callers name the ones they read with "fields" (or "include")
+PREDICT_SECTIONS = ('recommendations', 'input_analysis', 'risk_factors', 'model_info')
+
+# Recommendation settings
+TOP_K_CROPS = 5
+MIN_CROP_PROBABILITY = 0.1
+MAX_BATCH_SIZE = int(os.environ.get('ML_MAX_BATCH_SIZE', '50000'))
+
+# Streaming bulk scoring: uploads are parsed and scored STREAM_CHUNK_ROWS rows at a time
+STREAM_CHUNK_ROWS = int(os.environ.get('ML_STREAM_CHUNK_ROWS', '10000'))
+STREAM_FORMATS = {
+    'text/csv': 'csv',
+    'application/csv': 'csv',
+    'application/x-ndjson': 'ndjson',
+    'application/ndjson': 'ndjson',
+    'application/jsonl': 'ndjson'
+}
+
+# Synthetic training data size and generation block size
+SYNTHETIC_SAMPLES = int(os.environ.get('ML_SYNTHETIC_SAMPLES', '5000'))
+SYNTHETIC_CHUNK_SIZE = 1_000_000
+
+# Real training datasets (see datasets.py): /retrain only reads files inside DATASET_DIR.
+# Files with more than DATASET_MAX_ROWS valid rows are sampled down to that many
+DATASET_DIR = os.environ.get('ML_DATASET_DIR', 'data')
+DATASET_CHUNK_ROWS = int(os.environ.get('ML_DATASET_CHUNK_ROWS', '100000'))
+DATASET_MAX_ROWS = int(os.environ.get('ML_DATASET_MAX_ROWS', '2000000'))
+DATASET_MAX_REJECT_FRACTION = float(os.environ.get('ML_DATASET_MAX_REJECT_FRACTION', '0.1'))
+
+# Coalesce concurrent single-row /predict calls into one model pass (see micro_batcher.py)
+MICRO_BATCHING = os.environ.get('ML_MICRO_BATCHING', '0') == '1'
+MICRO_BATCH_WINDOW_MS = float(os.environ.get('ML_MICRO_BATCH_WINDOW_MS', '2'))
+MICRO_BATCH_MAX_SIZE = int(os.environ.get('ML_MICRO_BATCH_MAX_SIZE', '64'))
+
+# Random forest hyperparameters shared by the classifier and the regressor
+FOREST_PARAMS = {
+    'n_estimators': 100,
+    'random_state': 42,
+    'max_depth': 15,
+    'min_samples_split': 5,
+    'min_samples_leaf': 2
+}
+
+# Forest sizes swept when training with tune=True (see forest_tuner.py); the smallest pair of
+# forests within TUNE_TOLERANCE of the best accuracy and yield R2 is kept
+TUNE_N_ESTIMATORS = [int(n) for n in os.environ.get('ML_TUNE_N_ESTIMATORS', '25,50,100').split(',')]
+TUNE_MAX_DEPTHS = [int(depth) for depth in os.environ.get('ML_TUNE_MAX_DEPTHS', '8,10,12,15').split(',')]
+TUNE_TOLERANCE = float(os.environ.get('ML_TUNE_TOLERANCE', '0.01'))
+
+# Fit both forests concurrently across TRAINING_N_JOBS cores (-1 for all)
+PARALLEL_TRAINING = os.environ.get('ML_PARALLEL_TRAINING', '1') == '1'
+TRAINING_N_JOBS = int(os.environ.get('ML_TRAINING_N_JOBS', '-1'))
+
+# Model bundle artifact: one uncompressed joblib file holding everything needed to serve
+MODEL_DIR = os.environ.get('ML_MODEL_DIR', '.')
+BUNDLE_PATH = os.path.join(MODEL_DIR, 'model_bundle.joblib')
+# Locked by the worker process that is retraining or promoting, so one process writes the bundle at a time
+BUNDLE_LOCK_PATH = BUNDLE_PATH + '.lock'
+# Retraining job records shared by the worker processes, so any of them can answer /retrain/<job_id>
+RETRAIN_JOB_DIR = os.environ.get('ML_RETRAIN_JOB_DIR', os.path.join(MODEL_DIR, 'retrain_jobs'))
+BUNDLE_FORMAT = 1
+# How often each process checks whether another process saved a newer bundle (0 disables)
+BUNDLE_CHECK_SECONDS = float(os.environ.get('ML_BUNDLE_CHECK_SECONDS', '5'))
+
+# Observed outcomes posted to /feedback, and incremental updates that learn from them (see
+# feedback_log.py and incremental.py): each update adds INCREMENTAL_TREES trees and retires
+# as many of the oldest, fit on the new feedback plus REPLAY_RATIO times as many replay rows
+FEEDBACK_LOG_PATH = os.environ.get('ML_FEEDBACK_LOG', os.path.join(MODEL_DIR, 'feedback.log'))
+REPLAY_ROWS = int(os.environ.get('ML_REPLAY_ROWS', '20000'))
+INCREMENTAL_TREES = int(os.environ.get('ML_INCREMENTAL_TREES', '10'))
+INCREMENTAL_REPLAY_RATIO = float(os.environ.get('ML_INCREMENTAL_REPLAY_RATIO', '1.0'))
+INCREMENTAL_MAX_ROWS = int(os.environ.get('ML_INCREMENTAL_MAX_ROWS', '200000'))
+INCREMENTAL_HOLDOUT = 0.2  # Share of new feedback kept back to measure the update
+MAX_FEEDBACK_RECORDS = 1000
+feedback_log = FeedbackLog(FEEDBACK_LOG_PATH)
+
+# Precomputed suitability grid behind /predict/fast: (condition, start, stop, step) per axis,
+# in CONDITION_RULES order, stepped like FEATURE_QUANTA; inputs snap to the nearest grid point
+SUITABILITY_GRID_AXES = [
+    ('ph', 3.0, 10.0, 0.01),
+    ('temperature', -10.0, 55.0, 0.1),
+    ('humidity', 0.0, 100.0, 0.5),
+    ('rainfall', 0.0, 5000.0, 1.0)
+]
+SUITABILITY_GRID_PATH = os.path.join(MODEL_DIR, 'suitability_grid.joblib')
+# Directory holding a bundle and grid built into the image; copied into MODEL_DIR at startup when
+# it has no bundle, so a fresh volume mounted over MODEL_DIR does not cause a retrain
+BAKED_MODEL_DIR = os.environ.get('ML_BAKED_MODEL_DIR')
+GRID_REPORT_MAX_CELLS = 10_000_000  # Samples x crops in the error report, bounded for large catalogs
+# The tables grow by about 50 KB per catalog entry; larger catalogs are scored with the exact rules
+SUITABILITY_GRID_MAX_MB = float(os.environ.get('ML_SUITABILITY_GRID_MAX_MB', '64'))
+
+# Inference engine: 'sklearn', or 'compiled' for the array-backed forests in forest_engine.py
+INFERENCE_ENGINE = os.environ.get('ML_INFERENCE_ENGINE', 'sklearn')
+# Larger matrices go to sklearn, whose C traversal is faster on big batches
+COMPILED_ENGINE_MAX_ROWS = int(os.environ.get('ML_COMPILED_ENGINE_MAX_ROWS', '256'))
+# Keep compiled forests with float32 thresholds and leaf values (see CompiledForest.compact);
+# outputs then match sklearn to COMPACT_PARITY_TOLERANCE rather than bit for bit
+COMPILED_FLOAT32 = os.environ.get('ML_COMPILED_FLOAT32', '0') == '1'
+
+# Shadow scoring: a candidate bundle in ML_MODEL_DIR scores this fraction of /predict traffic
+# on ML_SHADOW_WORKERS background threads; comparisons beyond ML_SHADOW_MAX_PENDING are dropped
+SHADOW_SAMPLE_RATE = float(os.environ.get('ML_SHADOW_SAMPLE_RATE', '0.1'))
+SHADOW_WORKERS = int(os.environ.get('ML_SHADOW_WORKERS', '1'))
+SHADOW_MAX_PENDING = int(os.environ.get('ML_SHADOW_MAX_PENDING', '64'))
+
+# Prediction cache in front of /predict (see prediction_cache.py)
+PREDICTION_CACHE_ENABLED = os.environ.get('ML_PREDICTION_CACHE', '1') == '1'
+prediction_cache = PredictionCache(
+    max_entries=int(os.environ.get('ML_PREDICTION_CACHE_MAX_ENTRIES', '50000')),
+    max_bytes=int(os.environ.get('ML_PREDICTION_CACHE_MAX_MB', '64')) * 1024 * 1024,
+    ttl_seconds=float(os.environ.get('ML_PREDICTION_CACHE_TTL', '3600'))
+) if PREDICTION_CACHE_ENABLED else None
+
+# Request and per-stage latency metrics served at /metrics; can be switched off at runtime
+metrics = MetricsRegistry(enabled=os.environ.get('ML_METRICS', '1') == '1')
+metrics.describe('ml_predict_stage_seconds', 'histogram', 'Time spent in each stage of /predict')
+metrics.describe('ml_batch_stage_seconds', 'histogram', 'Time spent in each stage of /predict/batch')
+metrics.describe('ml_request_seconds', 'histogram', 'Request latency by endpoint')
+metrics.describe('ml_requests_total', 'counter', 'Requests by endpoint and status code')
+metrics.describe('ml_errors_total', 'counter', 'Requests answered with a 4xx or 5xx status')
+metrics.describe('ml_shadow_stage_seconds', 'histogram', 'Time spent in each stage of shadow bundle scoring')
+metrics.describe('ml_stream_stage_seconds', 'histogram', 'Time spent in each stage of /predict/stream, per chunk')
+metrics.describe('ml_stream_rows_total', 'counter', 'Rows scored or rejected by /predict/stream')
+metrics.describe('ml_default_filled_features_total', 'counter', 'Request features missing and filled with defaults')
+metrics.describe('ml_location_filled_features_total', 'counter', 'Request features missing and filled from the climate tiles')
+
+# On-demand cProfile sampling, armed through /profiling; with ML_PROFILE_HEADER=1 a request
+# sent with "X-ML-Profile: 1" is profiled too. Profiles rotate in ML_PROFILE_DIR
+PROFILE_HEADER = 'X-ML-Profile'
+PROFILE_HEADER_ENABLED = os.environ.get('ML_PROFILE_HEADER', '0') == '1'
+MAX_PROFILE_REQUESTS = 10000
+profiler = SamplingProfiler(
+    os.environ.get('ML_PROFILE_DIR', os.path.join(MODEL_DIR, 'profiles')),
+    max_files=int(os.environ.get('ML_PROFILE_MAX_FILES', '50')),
+    flush_every=int(os.environ.get('ML_PROFILE_FLUSH_REQUESTS', '20'))
+)
+
+def create_synthetic_dataset(n_samples=None, random_state=42):
     """Create synthetic training dataset for crop recommendation"""
-    logger.info("Creating synthetic training dataset...")
+    if n_samples is None:
+        n_samples = SYNTHETIC_SAMPLES
+    logger.info(f"Creating synthetic training dataset with {n_samples} samples...")
 
-    np.random.seed(42)
-    data = []
-    crops = list(CROP_DATABASE.keys())
+    rng = np.random.default_rng(random_state)
+    crops = CROP_NAMES
+    bounds = CROP_BOUNDS
 
-    # Generate 5000 samples
-    for _ in range(5000):
-        # Randomly select a crop
-        crop = np.random.choice(crops)
-        crop_info = CROP_DATABASE[crop]
-        opt_conditions = crop_info['optimal_conditions']
+    columns = {name: np.empty(n_samples, dtype=np.float32) for name in FEATURE_COLUMNS + ['yield']}
+    labels = np.empty(n_samples, dtype=np.int16)
+
+    # Generate in fixed-size blocks so float64 temporaries stay bounded
+    for start in range(0, n_samples, SYNTHETIC_CHUNK_SIZE):
+        stop = min(start + SYNTHETIC_CHUNK_SIZE, n_samples)
+        size = stop - start
+
+        # Randomly select a crop for every sample
+        crop_index = rng.integers(len(crops), size=size)
 
         # Generate features with some noise around optimal conditions
-        nitrogen = np.random.normal(50, 20)  # NPK values
-        phosphorus = np.random.normal(40, 15)
-        potassium = np.random.normal(35, 12)
+        nitrogen = rng.normal(50, 20, size)  # NPK values
+        phosphorus = rng.normal(40, 15, size)
+        potassium = rng.normal(35, 12, size)
 
         # Generate values closer to optimal for the selected crop
-        ph = np.random.uniform(opt_conditions['ph'][0] - 0.5, opt_conditions['ph'][1] + 0.5)
-        temperature = np.random.uniform(opt_conditions['temp'][0] - 5, opt_conditions['temp'][1] + 5)
-        humidity = np.random.uniform(opt_conditions['humidity'][0] - 10, opt_conditions['humidity'][1] + 10)
-        rainfall = np.random.uniform(opt_conditions['rainfall'][0] * 0.8, opt_conditions['rainfall'][1] * 1.2)
-
-        # Add some completely random samples for other crops
-        if np.random.random() < 0.3:  # 30% random samples
-            crop = np.random.choice(crops)
-            ph = np.random.uniform(4.5, 9.0)
-            temperature = np.random.uniform(5, 45)
-            humidity = np.random.uniform(30, 95)
-            rainfall = np.random.uniform(200, 2500)
+        ph = rng.uniform(bounds[crop_index, 0, 0] - 0.5, bounds[crop_index, 0, 1] + 0.5)
+        temperature = rng.uniform(bounds[crop_index, 1, 0] - 5, bounds[crop_index, 1, 1] + 5)
+        humidity = rng.uniform(bounds[crop_index, 2, 0] - 10, bounds[crop_index, 2, 1] + 10)
+        rainfall = rng.uniform(bounds[crop_index, 3, 0] * 0.8, bounds[crop_index, 3, 1] * 1.2)
+
+        # Add some completely random samples for other crops (30%)
+        random_rows = np.flatnonzero(rng.random(size) < 0.3)
+        n_random = len(random_rows)
+        crop_index[random_rows] = rng.integers(len(crops), size=n_random)
+        ph[random_rows] = rng.uniform(4.5, 9.0, n_random)
+        temperature[random_rows] = rng.uniform(5, 45, n_random)
+        humidity[random_rows] = rng.uniform(30, 95, n_random)
+        rainfall[random_rows] = rng.uniform(200, 2500, n_random)
 
         # Calculate yield based on conditions match
-        yield_factor = calculate_yield_factor(crop, ph, temperature, humidity, rainfall)
-        base_yield = np.mean(CROP_DATABASE[crop]['yield_range'])
-        predicted_yield = base_yield * yield_factor * np.random.uniform(0.8, 1.2)
+        yield_factor = indexed_yield_factors(crop_index, ph, temperature, humidity, rainfall)
+        predicted_yield = CROP_BASE_YIELD[crop_index] * yield_factor * rng.uniform(0.8, 1.2, size)
 
-        data.append([nitrogen, phosphorus, potassium, temperature, humidity, ph, rainfall, 
-                    crop, predicted_yield])
+        for name, values in zip(FEATURE_COLUMNS + ['yield'],
+                                (nitrogen, phosphorus, potassium, temperature, humidity, ph, rainfall,
+                                 predicted_yield)):
+            columns[name][start:stop] = values
+        labels[start:stop] = crop_index
 
-    df = pd.DataFrame(data, columns=['N', 'P', 'K', 'temperature', 'humidity', 'ph', 'rainfall', 
-                                   'label', 'yield'])
+    df = pd.DataFrame(columns)
+    df.insert(len(FEATURE_COLUMNS), 'label', pd.Categorical.from_codes(labels, categories=crops))
 
     logger.info(f"Dataset created with {len(df)} samples")
     logger.info(f"Crops distribution: {df['label'].value_counts().to_dict()}")
@@ -144,134 +412,755 @@ def create_synthetic_dataset():
 
 def calculate_yield_factor(crop, ph, temperature, humidity, rainfall):
     """Calculate yield factor based on how well conditions match optimal requirements"""
-    crop_info = CROP_DATABASE[crop]
-    opt_conditions = crop_info['optimal_conditions']
-
-    factors = []
-
-    # pH factor
-    ph_range = opt_conditions['ph']
-    if ph_range[0] <= ph <= ph_range[1]:
-        factors.append(1.0)
-    else:
-        deviation = min(abs(ph - ph_range[0]), abs(ph - ph_range[1]))
-        factors.append(max(0.3, 1 - (deviation * 0.2)))
-
-    # Temperature factor
-    temp_range = opt_conditions['temp']
-    if temp_range[0] <= temperature <= temp_range[1]:
-        factors.append(1.0)
-    else:
-        deviation = min(abs(temperature - temp_range[0]), abs(temperature - temp_range[1]))
-        factors.append(max(0.2, 1 - (deviation * 0.05)))
-
-    # Humidity factor
-    humidity_range = opt_conditions['humidity']
-    if humidity_range[0] <= humidity <= humidity_range[1]:
-        factors.append(1.0)
-    else:
-        deviation = min(abs(humidity - humidity_range[0]), abs(humidity - humidity_range[1]))
-        factors.append(max(0.3, 1 - (deviation * 0.02)))
-
-    # Rainfall factor
-    rainfall_range = opt_conditions['rainfall']
-    if rainfall_range[0] <= rainfall <= rainfall_range[1]:
-        factors.append(1.0)
-    else:
-        deviation = min(abs(rainfall - rainfall_range[0]), abs(rainfall - rainfall_range[1]))
-        factors.append(max(0.2, 1 - (deviation * 0.001)))
+    row = crop_catalog.row(crop)
+    if row is None:
+        raise KeyError(crop)
+    return suitability_matrix(ph, temperature, humidity, rainfall, crop_catalog.bounds[row:row + 1])[0, 0]
+
+def condition_factor(condition, value, bounds):
+    """Factor of one CONDITION_RULES condition for values against the optimal ranges bounds[..., condition, :],
+    broadcast together; the one implementation behind every yield factor"""
+    # Distance to the nearest bound, zero inside the optimal range
+    deviation = (np.maximum(bounds[..., condition, 0] - value, 0)
+                 + np.maximum(value - bounds[..., condition, 1], 0))
+    return np.maximum(CONDITION_FLOORS[condition], 1 - deviation * CONDITION_SLOPES[condition])
+
+def yield_factors(values, bounds):
+    """Mean condition factor of (ph, temperature, humidity, rainfall) values against bounds, broadcast together"""
+    total = 0.0
+    for i, value in enumerate(values):
+        total = total + condition_factor(i, value, bounds)
+
+    return total / len(CONDITION_RULES)
+
+def condition_factors(condition, value, bounds=None):
+    """Factor of one CONDITION_RULES condition for every catalog crop (or row of bounds), shape (n_samples, n_crops)"""
+    bounds = crop_catalog.bounds if bounds is None else bounds
+    return condition_factor(condition, np.atleast_1d(np.asarray(value, dtype=np.float64))[:, np.newaxis], bounds)
+
+def suitability_matrix(ph, temperature, humidity, rainfall, bounds=None):
+    """Yield factor of every catalog crop (or row of bounds) for every sample in one NumPy pass, shape (n_samples, n_crops)"""
+    bounds = crop_catalog.bounds if bounds is None else bounds
+    values = [np.atleast_1d(np.asarray(value, dtype=np.float64))[:, np.newaxis]
+              for value in (ph, temperature, humidity, rainfall)]
+    return yield_factors(values, bounds)
+
+def indexed_yield_factors(crop_index, ph, temperature, humidity, rainfall):
+    """Yield factor of one crop per sample, given as indices into CROP_NAMES"""
+    values = [np.asarray(value, dtype=np.float64) for value in (ph, temperature, humidity, rainfall)]
+    return yield_factors(values, CROP_BOUNDS[crop_index])
+
+def load_training_dataset(path):
+    """Load a real training dataset in chunks; returns the DataFrame and the loading report"""
+    logger.info(f"Loading training dataset {path}...")
+    df, report = load_dataset(path, FEATURE_RANGES, DATASET_ALIASES, DATASET_CHUNK_ROWS,
+                              DATASET_MAX_ROWS, DATASET_MAX_REJECT_FRACTION)
+
+    logger.info(f"Dataset loaded: {report['rows_used']} of {report['rows_read']} rows used, "
+                f"rejected {report['rows_rejected']}{', sampled' if report['sampled'] else ''}")
+    if report['dropped_labels']:
+        logger.warning(f"Crops with too few rows left out: {report['dropped_labels']}")
+    unknown = [crop for crop in report['labels'] if crop_catalog.row(crop) is None]
+    if unknown:
+        logger.warning(f"Crops missing from the crop catalog are ranked with rice's conditions: {unknown}")
+    logger.info(f"Crops distribution: {df['label'].value_counts().to_dict()}")
+    return df, report
 
-    return np.mean(factors)
+def resolve_under(base_dir, path):
+    """Real path of a file named relative to base_dir, or None if it lies outside it (through .. or symlinks)"""
+    root = os.path.realpath(base_dir)
+    full_path = os.path.realpath(os.path.join(root, path))
+    if os.path.commonpath([root, full_path]) != root:
+        return None
+    return full_path
 
-def train_models():
+def fit_models(n_samples=None, parallel=None, tune=False, tolerance=None, dataset_path=None):
     """Train machine learning models for crop recommendation and yield prediction"""
-    global crop_model, yield_model, label_encoder, scaler, model_accuracy
-
-    logger.info("Starting model training...")
+    if parallel is None:
+        parallel = PARALLEL_TRAINING
+    if tolerance is None:
+        tolerance = TUNE_TOLERANCE
+    logger.info(f"Starting model training ({'parallel' if parallel else 'sequential'} mode)...")
+    timings = {}
 
     # Create or load dataset
-    df = create_synthetic_dataset()
+    stage_start = time.perf_counter()
+    if dataset_path:
+        df, dataset_report = load_training_dataset(dataset_path)
+        timings['data_loading'] = time.perf_counter() - stage_start
+    else:
+        df, dataset_report = create_synthetic_dataset(n_samples), None
+        timings['data_generation'] = time.perf_counter() - stage_start
 
     # Prepare features
-    features = ['N', 'P', 'K', 'temperature', 'humidity', 'ph', 'rainfall']
-    X = df[features]
+    X = df[FEATURE_COLUMNS]
     y_crop = df['label']
-    y_yield = df['yield']
+    y_yield = df['yield'].to_numpy()
 
-    # Encode labels
+    # Encode labels and scale features
+    stage_start = time.perf_counter()
     label_encoder = LabelEncoder()
     y_crop_encoded = label_encoder.fit_transform(y_crop)
-
-    # Scale features
     scaler = StandardScaler()
     X_scaled = scaler.fit_transform(X)
+    timings['scaling'] = time.perf_counter() - stage_start
 
-    # Split data
-    X_train, X_test, y_crop_train, y_crop_test = train_test_split(
-        X_scaled, y_crop_encoded, test_size=0.2, random_state=42, stratify=y_crop_encoded
+    # One stratified split shared by both models
+    train_index, test_index = train_test_split(
+        np.arange(len(df)), test_size=0.2, random_state=42, stratify=y_crop_encoded
     )
-
-    # Train crop recommendation model (Random Forest Classifier)
-    logger.info("Training crop recommendation model...")
-    crop_model = RandomForestClassifier(
-        n_estimators=100,
-        random_state=42,
-        max_depth=15,
-        min_samples_split=5,
-        min_samples_leaf=2
+    X_train, X_test = X_scaled[train_index], X_scaled[test_index]
+
+    # Rows kept with the bundle for incremental updates; test rows stay held out there too
+    replay = replay_sample(X.to_numpy(dtype=np.float32), y_crop_encoded, y_yield,
+                           np.isin(np.arange(len(df)), test_index), REPLAY_ROWS)
+
+    # Train crop recommendation (classifier) and yield prediction (regressor) forests
+    stage_start = time.perf_counter()
+    n_jobs = effective_n_jobs(TRAINING_N_JOBS) if parallel else 1
+    crop_model = RandomForestClassifier(n_jobs=max(1, n_jobs // 2), **FOREST_PARAMS)
+    yield_model = RandomForestRegressor(n_jobs=max(1, n_jobs - n_jobs // 2), **FOREST_PARAMS)
+    fits = [(crop_model, y_crop_encoded[train_index]), (yield_model, y_yield[train_index])]
+    tuning = None
+
+    if tune:
+        # Sweep forest sizes on the same split and keep the smallest within tolerance
+        logger.info(f"Sweeping {TUNE_N_ESTIMATORS} trees x depths {TUNE_MAX_DEPTHS} on {n_jobs} cores...")
+        candidates = sweep(
+            X_train, y_crop_encoded[train_index], y_yield[train_index],
+            X_test, y_crop_encoded[test_index], y_yield[test_index],
+            TUNE_N_ESTIMATORS, TUNE_MAX_DEPTHS, FOREST_PARAMS, n_jobs
+        )
+        selected = select_candidate(candidates, tolerance)
+        crop_model, yield_model = selected['models']
+        for candidate in candidates:
+            candidate.pop('models')
+            logger.info(f"  {candidate['n_estimators']:>4} trees, depth {candidate['max_depth']:>3}: "
+                        f"accuracy {candidate['accuracy']:.4f}, R2 {candidate['yield_r2']:.4f}, "
+                        f"{candidate['nodes']} nodes, single row {candidate['single_row_ms']} ms "
+                        f"(compiled {candidate['compiled_single_row_ms']} ms)")
+        tuning = {'tolerance': tolerance, 'selected': selected, 'candidates': candidates}
+        logger.info(f"Selected {selected['n_estimators']} trees of depth {selected['max_depth']}")
+    elif parallel:
+        # Tree building releases the GIL, so both forests grow at once on separate cores
+        logger.info(f"Training crop recommendation and yield prediction models on {n_jobs} cores...")
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            for future in [executor.submit(model.fit, X_train, y) for model, y in fits]:
+                future.result()
+    else:
+        for model, y in fits:
+            logger.info(f"Training {type(model).__name__}...")
+            model.fit(X_train, y)
+
+    # Single-row inference is fastest without joblib dispatch
+    crop_model.n_jobs = yield_model.n_jobs = None
+    timings['fit'] = time.perf_counter() - stage_start
+
+    # Evaluate both models on the held-out split
+    stage_start = time.perf_counter()
+    accuracy = accuracy_score(y_crop_encoded[test_index], crop_model.predict(X_test))
+    yield_r2 = r2_score(y_yield[test_index], yield_model.predict(X_test))
+    timings['evaluation'] = time.perf_counter() - stage_start
+    logger.info(f"Crop model accuracy: {accuracy:.4f}, yield model R2: {yield_r2:.4f}")
+
+    return ModelBundle(
+        crop_model=crop_model,
+        yield_model=yield_model,
+        label_encoder=label_encoder,
+        scaler=scaler,
+        accuracy=float(accuracy),
+        trained_at=datetime.now().isoformat(),
+        generation=0,
+        crop_engine=None,
+        yield_engine=None,
+        metadata={
+            'n_samples': len(df),
+            'dataset': dataset_report,
+            'yield_r2': float(yield_r2),
+            'parallel': parallel,
+            'n_jobs': n_jobs,
+            'forest_params': {'n_estimators': crop_model.n_estimators, 'max_depth': crop_model.max_depth},
+            'tuning': tuning,
+            'feedback_offset': 0,
+            'replay_seen': len(df),
+            'timings': timings
+        },
+        replay=replay
     )
-    crop_model.fit(X_train, y_crop_train)
 
-    # Evaluate crop model
-    y_crop_pred = crop_model.predict(X_test)
-    model_accuracy = accuracy_score(y_crop_test, y_crop_pred)
-    logger.info(f"Crop model accuracy: {model_accuracy:.4f}")
-
-    # Train yield prediction model (Random Forest Regressor)
-    logger.info("Training yield prediction model...")
-    X_yield_train, X_yield_test, y_yield_train, y_yield_test = train_test_split(
-        X_scaled, y_yield, test_size=0.2, random_state=42
+def update_models_incrementally(bundle, parallel=None):
+    """Grow the bundle's forests with trees fit on the feedback logged since its last update"""
+    if parallel is None:
+        parallel = PARALLEL_TRAINING
+    if bundle.replay is None:
+        raise ValueError('Model bundle has no replay sample; run a full retrain first')
+    timings = {}
+
+    # Only the records logged since the last update are read, at most INCREMENTAL_MAX_ROWS of them
+    stage_start = time.perf_counter()
+    total = len(feedback_log)
+    start = max(bundle.metadata.get('feedback_offset', 0), total - INCREMENTAL_MAX_ROWS)
+    records = feedback_log.read(start, total)
+    if not len(records):
+        raise ValueError('No new feedback since the last update')
+    logger.info(f"Incremental update from {len(records)} feedback records...")
+
+    class_index = {crop: i for i, crop in enumerate(bundle.label_encoder.classes_)}
+    X_new = np.array(records['features'], dtype=np.float32)
+    labels_new = np.array([class_index.get(crop.decode('utf-8'), -1) for crop in records['crop']], dtype=np.int32)
+    yields_new = np.array(records['yield'], dtype=np.float32)
+    holdout_new = np.random.default_rng(total).random(len(records)) < INCREMENTAL_HOLDOUT
+    timings['data_loading'] = time.perf_counter() - stage_start
+
+    # New training rows plus about as many replay rows, which cover every crop class
+    stage_start = time.perf_counter()
+    replay_X, replay_labels, replay_yields, replay_holdout = bundle.replay
+    replay_train = np.flatnonzero(~replay_holdout)
+    n_replay = int(np.ceil((~holdout_new).sum() * INCREMENTAL_REPLAY_RATIO))
+    picked = replay_train[pick_replay_rows(replay_labels[replay_train], n_replay, len(class_index),
+                                           np.random.default_rng(total))]
+    X_fit = bundle.scaler.transform(np.concatenate([X_new[~holdout_new], replay_X[picked]]))
+    labels_fit = np.concatenate([labels_new[~holdout_new], replay_labels[picked]])
+    yields_fit = np.concatenate([yields_new[~holdout_new], replay_yields[picked]])
+
+    # Crops the classifier was not trained on, and records without a yield, only train the other forest
+    known, measured = labels_fit >= 0, np.isfinite(yields_fit)
+    seed = FOREST_PARAMS['random_state'] + total
+    n_jobs = effective_n_jobs(TRAINING_N_JOBS) if parallel else 1
+    crop_model = grow_forest(bundle.crop_model, X_fit[known], labels_fit[known], INCREMENTAL_TREES, seed, n_jobs)
+    yield_model = grow_forest(bundle.yield_model, X_fit[measured], yields_fit[measured], INCREMENTAL_TREES,
+                              seed, n_jobs)
+    timings['fit'] = time.perf_counter() - stage_start
+
+    # Before and after on held-out new feedback and on the replay holdout (older unseen rows)
+    stage_start = time.perf_counter()
+    evaluation = {}
+    for name, (X_eval, labels_eval, yields_eval) in {
+        'feedback': (X_new[holdout_new], labels_new[holdout_new], yields_new[holdout_new]),
+        'replay': (replay_X[replay_holdout], replay_labels[replay_holdout], replay_yields[replay_holdout])
+    }.items():
+        X_eval = bundle.scaler.transform(X_eval) if len(X_eval) else X_eval
+        evaluation[name] = {
+            'before': evaluate(bundle.crop_model, bundle.yield_model, X_eval, labels_eval, yields_eval),
+            'after': evaluate(crop_model, yield_model, X_eval, labels_eval, yields_eval)
+        }
+    timings['evaluation'] = time.perf_counter() - stage_start
+    for name, result in evaluation.items():
+        logger.info(f"Accuracy on {name} holdout ({result['after']['rows']} rows): "
+                    f"{result['before']['accuracy']} -> {result['after']['accuracy']}")
+
+    # New feedback joins the replay sample, which stays a uniform sample of all rows seen
+    reservoir = Reservoir(REPLAY_ROWS, seed, rows=bundle.replay,
+                          seen=bundle.metadata.get('replay_seen', len(replay_labels)))
+    reservoir.add(X_new, labels_new, yields_new, holdout_new)
+
+    accuracy = evaluation['replay']['after']['accuracy']
+    return bundle._replace(
+        crop_model=crop_model,
+        yield_model=yield_model,
+        accuracy=bundle.accuracy if accuracy is None else accuracy,
+        trained_at=datetime.now().isoformat(),
+        crop_engine=None,
+        yield_engine=None,
+        metadata=dict(
+            bundle.metadata,
+            feedback_offset=total,
+            replay_seen=reservoir.seen,
+            incremental={
+                'records': len(records),
+                'rows_fit': int(len(labels_fit)),
+                'trees_added': INCREMENTAL_TREES,
+                'trees_retired': INCREMENTAL_TREES,
+                'unknown_crops': int((labels_new < 0).sum()),
+                'evaluation': evaluation,
+                'updated_at': datetime.now().isoformat()
+            },
+            timings=timings
+        ),
+        replay=reservoir.rows()
     )
 
-    yield_model = RandomForestRegressor(
-        n_estimators=100,
-        random_state=42,
-        max_depth=15,
-        min_samples_split=5,
-        min_samples_leaf=2
+def save_model_bundle(bundle, path=None):
+    """Write models, encoder, scaler, compiled forests and metadata as one bundle file"""
+    path = path or BUNDLE_PATH
+    crop_engine, yield_engine = bundle.crop_engine, bundle.yield_engine
+    if crop_engine is None:
+        crop_engine = CompiledForest.from_sklearn(bundle.crop_model)
+        yield_engine = CompiledForest.from_sklearn(bundle.yield_model)
+    if COMPILED_FLOAT32 and not crop_engine.is_compact:
+        crop_engine, yield_engine = crop_engine.compact(), yield_engine.compact()
+
+    payload = {
+        'format': BUNDLE_FORMAT,
+        'model_version': model_version,
+        'crop_model': bundle.crop_model,
+        'yield_model': bundle.yield_model,
+        'label_encoder': bundle.label_encoder,
+        'scaler': bundle.scaler,
+        'crop_engine': crop_engine,
+        'yield_engine': yield_engine,
+        'accuracy': bundle.accuracy,
+        'trained_at': bundle.trained_at,
+        'metadata': dict(bundle.metadata, classes=bundle.label_encoder.classes_.tolist(), features=FEATURE_COLUMNS),
+        'replay': bundle.replay
+    }
+
+    # Uncompressed so the arrays can be memory-mapped on load; replaced atomically. The temporary
+    # file is per process, so concurrent writers never write into each other's file
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        joblib.dump(payload, tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return path
+
+def acquire_bundle_lock():
+    """Take the bundle writer lock shared by all processes without waiting; the open lock file, or None if held"""
+    os.makedirs(os.path.dirname(os.path.abspath(BUNDLE_LOCK_PATH)), exist_ok=True)
+    lock_file = open(BUNDLE_LOCK_PATH, 'a')
+    if fcntl is not None:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return None
+    return lock_file
+
+def release_bundle_lock(lock_file):
+    lock_file.close()  # Closing the file releases the lock
+
+def load_model_bundle(path=None):
+    """Load a bundle file with its NumPy arrays memory-mapped read-only"""
+    payload = joblib.load(path or BUNDLE_PATH, mmap_mode='r')
+    if payload.get('format') != BUNDLE_FORMAT:
+        raise ValueError(f"Unsupported model bundle format: {payload.get('format')}")
+
+    return ModelBundle(
+        crop_model=payload['crop_model'],
+        yield_model=payload['yield_model'],
+        label_encoder=payload['label_encoder'],
+        scaler=payload['scaler'],
+        accuracy=payload['accuracy'],
+        trained_at=payload['trained_at'],
+        generation=0,
+        crop_engine=payload['crop_engine'],
+        yield_engine=payload['yield_engine'],
+        metadata=dict(payload['metadata'], source='bundle'),
+        replay=payload.get('replay')
     )
-    yield_model.fit(X_yield_train, y_yield_train)
 
-    # Save models
+def save_models(bundle):
+    """Save the model bundle to disk; returns a copy with the serialization time in its timings"""
+    stage_start = time.perf_counter()
     try:
-        joblib.dump(crop_model, 'crop_model.pkl')
-        joblib.dump(yield_model, 'yield_model.pkl')
-        joblib.dump(label_encoder, 'label_encoder.pkl')
-        joblib.dump(scaler, 'scaler.pkl')
-        logger.info("Models saved successfully")
+        save_model_bundle(bundle)
+        _bundle_state['mtime'] = os.path.getmtime(BUNDLE_PATH)
+        logger.info(f"Models saved successfully to {BUNDLE_PATH}")
     except Exception as e:
         logger.error(f"Error saving models: {e}")
 
+    if 'timings' in bundle.metadata:
+        # Bundles are never modified in place, so a new metadata dict rather than an update
+        timings = dict(bundle.metadata['timings'], serialization=time.perf_counter() - stage_start)
+        bundle = bundle._replace(metadata=dict(bundle.metadata, timings=timings))
+        logger.info("Training stage times: " + ', '.join(
+            f"{stage} {seconds:.2f}s" for stage, seconds in timings.items()))
+    return bundle
+
+def train_models(n_samples=None, parallel=None, tune=False, tolerance=None, dataset_path=None, source=None):
+    """Train, save and install new models on the calling thread; source, if given, is recorded in the metadata"""
+    bundle = save_models(fit_models(n_samples, parallel, tune, tolerance, dataset_path))
+    if source is not None:
+        bundle = bundle._replace(metadata=dict(bundle.metadata, source=source))
+    bundle = install_models(bundle)
     logger.info("Model training completed successfully")
+    return bundle
 
 def load_models():
-    """Load pre-trained models if they exist"""
-    global crop_model, yield_model, label_encoder, scaler, model_accuracy
-
+    """Load pre-trained models if they exist, preferring the single bundle file"""
     try:
-        if all(os.path.exists(f) for f in ['crop_model.pkl', 'yield_model.pkl', 'label_encoder.pkl', 'scaler.pkl']):
-            crop_model = joblib.load('crop_model.pkl')
-            yield_model = joblib.load('yield_model.pkl')
-            label_encoder = joblib.load('label_encoder.pkl')
-            scaler = joblib.load('scaler.pkl')
-            model_accuracy = 0.96  # Placeholder
-            logger.info("Models loaded successfully from disk")
+        if os.path.exists(BUNDLE_PATH):
+            bundle_mtime = os.path.getmtime(BUNDLE_PATH)
+            install_models(load_model_bundle(BUNDLE_PATH))
+            _bundle_state['mtime'] = bundle_mtime
+            logger.info(f"Models loaded successfully from {BUNDLE_PATH}")
+            return True
+
+        # Older deployments saved four separate pickles
+        legacy_paths = [os.path.join(MODEL_DIR, name) for name in
+                        ['crop_model.pkl', 'yield_model.pkl', 'label_encoder.pkl', 'scaler.pkl']]
+        if all(os.path.exists(f) for f in legacy_paths):
+            crop_model, yield_model, label_encoder, scaler = [joblib.load(f) for f in legacy_paths]
+            bundle = ModelBundle(
+                crop_model=crop_model,
+                yield_model=yield_model,
+                label_encoder=label_encoder,
+                scaler=scaler,
+                accuracy=0.0,  # Not recorded by the legacy format
+                trained_at=datetime.fromtimestamp(os.path.getmtime(legacy_paths[0])).isoformat(),
+                generation=0,
+                crop_engine=None,
+                yield_engine=None,
+                metadata={'source': 'legacy pickles'}
+            )
+            logger.warning("Loaded legacy model pickles without recorded accuracy; retrain to create a bundle")
+            install_models(bundle)
             return True
     except Exception as e:
         logger.error(f"Error loading models: {e}")
 
     return False
 
+def seed_model_dir():
+    """Copy the baked bundle and grid into an empty MODEL_DIR; returns the files copied"""
+    if not BAKED_MODEL_DIR or os.path.exists(BUNDLE_PATH):
+        return []
+
+    copied = []
+    for target in [BUNDLE_PATH, SUITABILITY_GRID_PATH]:
+        source = os.path.join(BAKED_MODEL_DIR, os.path.basename(target))
+        if not os.path.exists(source) or os.path.exists(target):
+            continue
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(target)), exist_ok=True)
+            shutil.copyfile(source, f"{target}.{os.getpid()}.tmp")
+            os.replace(f"{target}.{os.getpid()}.tmp", target)
+            copied.append(target)
+        except OSError as e:
+            logger.error(f"Error copying baked {source} into {MODEL_DIR}: {e}")
+    if copied:
+        logger.info(f"Seeded {MODEL_DIR} from {BAKED_MODEL_DIR}: {', '.join(map(os.path.basename, copied))}")
+    return copied
+
+def init_models():
+    """Load the model bundle, or train one if none exists, and record the cold-start time"""
+    stage_start = time.perf_counter()
+    seed_model_dir()
+    if not load_models():
+        logger.info("No existing models found, training new models...")
+        train_models(source='trained at startup')
+
+    startup_info.update(
+        seconds=round(time.perf_counter() - stage_start, 4),
+        source=model_bundle.metadata.get('source'),
+        completed_at=datetime.now().isoformat()
+    )
+    logger.info(f"Models ready in {startup_info['seconds']:.3f}s ({startup_info['source']})")
+    load_crop_catalog(rebuild_grid=False)
+    load_suitability_grid()
+    load_climate_tiles()
+
+def load_climate_tiles():
+    """Memory-map the climate tiles at CLIMATE_TILES_PATH, if configured"""
+    global climate_tiles
+    if not CLIMATE_TILES_PATH:
+        return None
+
+    try:
+        climate_tiles = ClimateTiles.load(CLIMATE_TILES_PATH)
+        logger.info(f"Climate tiles loaded from {CLIMATE_TILES_PATH}: {climate_tiles.shape} points, "
+                    f"fields {climate_tiles.fields}, seasons {climate_tiles.seasons}")
+    except Exception as e:
+        logger.error(f"Error loading climate tiles, requests will use feature defaults: {e}")
+    return climate_tiles
+
+def load_crop_catalog(rebuild_grid=True):
+    """Install the catalog at CROP_CATALOG_PATH (or the built-in one) with one reference swap"""
+    global crop_catalog
+    if not CROP_CATALOG_PATH:
+        return crop_catalog
+
+    catalog_mtime = os.path.getmtime(CROP_CATALOG_PATH)
+    catalog = CropCatalog.open(CROP_CATALOG_PATH)
+    _catalog_state['mtime'] = catalog_mtime
+    if catalog.version != crop_catalog.version:
+        crop_catalog = catalog
+        _crop_pages.clear()
+        if rebuild_grid:
+            load_suitability_grid()
+        logger.info(f"Crop catalog loaded from {CROP_CATALOG_PATH}: {len(catalog)} entries, version {catalog.version}")
+    return crop_catalog
+
+def install_models(bundle):
+    """Make a bundle the active model set with one reference swap"""
+    global model_bundle, model_generation
+
+    crop_engine, yield_engine = compile_inference_engines(bundle)
+
+    with _install_lock:
+        # A new generation makes every cached prediction unreachable at once
+        model_generation += 1
+        model_bundle = bundle._replace(
+            generation=model_generation, crop_engine=crop_engine, yield_engine=yield_engine
+        )
+
+    if prediction_cache is not None:
+        prediction_cache.clear()
+
+    return model_bundle
+
+def compile_inference_engines(bundle, engine=None, keep_stored=False):
+    """Compile a bundle's forests into array-backed engines when that engine is selected"""
+    if (engine or INFERENCE_ENGINE) != 'compiled':
+        return None, None
+
+    try:
+        # Bundles loaded from disk carry memory-mapped compiled forests already; keep_stored uses
+        # them as saved, compacted or not
+        compiled_crop, compiled_yield = bundle.crop_engine, bundle.yield_engine
+        if (compiled_crop is None or compiled_yield is None
+                or not keep_stored and compiled_crop.is_compact != COMPILED_FLOAT32):
+            compiled_crop = CompiledForest.from_sklearn(bundle.crop_model)
+            compiled_yield = CompiledForest.from_sklearn(bundle.yield_model)
+            if COMPILED_FLOAT32:
+                compiled_crop, compiled_yield = compiled_crop.compact(), compiled_yield.compact()
+
+        # Only serve from the compiled forests if they reproduce sklearn (exactly, unless compacted)
+        probe = parity_probe(bundle.crop_model.n_features_in_)
+        tolerance = COMPACT_PARITY_TOLERANCE if compiled_crop.is_compact else 0.0
+        if (verify_parity(bundle.crop_model, compiled_crop, probe, tolerance)
+                and verify_parity(bundle.yield_model, compiled_yield, probe, tolerance)):
+            logger.info(f"Compiled inference engine ready ({len(compiled_crop.feature) + len(compiled_yield.feature)} nodes)")
+            return compiled_crop, compiled_yield
+
+        logger.warning("Compiled forests do not match sklearn output, falling back to sklearn inference")
+    except Exception as e:
+        logger.error(f"Error compiling inference engines: {e}")
+
+    return None, None
+
+def load_scoring_bundle(path=None):
+    """Load a bundle with the inference engines the API would serve it with, without installing it"""
+    bundle = load_model_bundle(path)
+    crop_engine, yield_engine = compile_inference_engines(bundle)
+    return bundle._replace(crop_engine=crop_engine, yield_engine=yield_engine)
+
+def load_shadow_bundle(path, sample_rate=None, engine=None):
+    """Load a candidate bundle as the shadow, replacing any previous one"""
+    global shadow_scorer
+    bundle = load_model_bundle(path)
+    # The candidate's compiled forests are scored as saved, so a compacted bundle is measured as such
+    crop_engine, yield_engine = compile_inference_engines(bundle, engine, keep_stored=True)
+    bundle = bundle._replace(crop_engine=crop_engine, yield_engine=yield_engine)
+
+    previous = shadow_scorer
+    shadow_scorer = ShadowScorer(
+        bundle, score_shadow, SHADOW_SAMPLE_RATE if sample_rate is None else sample_rate,
+        max_workers=SHADOW_WORKERS, max_pending=SHADOW_MAX_PENDING, source=path
+    )
+    if previous is not None:
+        previous.close()
+    logger.info(f"Shadow bundle loaded from {path}, scoring {shadow_scorer.sample_rate:.1%} of /predict requests")
+    return shadow_scorer
+
+def unload_shadow_bundle():
+    """Stop shadow scoring; returns the scorer that was active, if any"""
+    global shadow_scorer
+    shadow, shadow_scorer = shadow_scorer, None
+    if shadow is not None:
+        shadow.close()
+    return shadow
+
+def _train_in_worker(n_samples, parallel, tune=False, tolerance=None, dataset_path=None, incremental=False,
+                     profile_path=None):
+    """Retraining job body, run in a separate process; returns the saved bundle path"""
+    if profile_path:
+        return profile_call(profile_path, _train_in_worker, n_samples, parallel, tune, tolerance, dataset_path,
+                            incremental)
+
+    if incremental:
+        bundle = update_models_incrementally(load_model_bundle(BUNDLE_PATH), parallel)
+    else:
+        bundle = fit_models(n_samples, parallel, tune, tolerance, dataset_path)
+    return save_model_bundle(bundle)
+
+def submit_retrain_job(n_samples=None, parallel=None, tune=False, tolerance=None, dataset_path=None,
+                       incremental=False):
+    """Start retraining in a background process; returns the job, or None if one is running in any worker"""
+    with _retrain_lock:
+        if any(job['status'] == 'running' for job in retrain_jobs.values()):
+            return None
+        # Held until the job finishes; a job in another worker process holds it already
+        lock_file = acquire_bundle_lock()
+        if lock_file is None:
+            return None
+
+        job_id = uuid.uuid4().hex[:12]
+        job = {
+            'job_id': job_id,
+            'status': 'running',
+            'mode': 'incremental' if incremental else 'full',
+            'n_samples': None if dataset_path or incremental else n_samples or SYNTHETIC_SAMPLES,
+            'dataset_path': dataset_path,
+            'tune': bool(tune),
+            'profile_file': profiler.training_path(job_id),
+            'submitted_at': datetime.now().isoformat(),
+            'worker_pid': os.getpid(),
+            '_done': threading.Event(),
+            '_lock': lock_file
+        }
+        retrain_jobs[job_id] = job
+        save_job_record(job)
+
+        # Forget the oldest finished jobs
+        for old_id in list(retrain_jobs)[:-MAX_RETAINED_JOBS]:
+            del retrain_jobs[old_id]
+
+    # A fresh spawned process per job returns all training memory to the OS afterwards
+    executor = None
+    try:
+        executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn'))
+        future = executor.submit(_train_in_worker, n_samples, parallel, tune, tolerance, dataset_path, incremental,
+                                 job['profile_file'])
+    except Exception as e:
+        # Nothing will finish this job, so fail it here and free the lock for the next one
+        job.update(status='failed', error=f"Could not start the training process: {e}",
+                   finished_at=datetime.now().isoformat())
+        logger.error(f"Retraining job {job_id} could not start: {e}")
+        save_job_record(job)
+        release_bundle_lock(lock_file)
+        job['_done'].set()
+        if executor is not None:
+            executor.shutdown(wait=False)
+        return job
+
+    future.add_done_callback(lambda done: _finish_retrain_job(job, done, executor))
+    return job
+
+def _finish_retrain_job(job, future, executor):
+    """Install the bundle produced by a retraining job and record its outcome"""
+    try:
+        # Loading the file memory-maps the arrays instead of copying them out of the worker
+        bundle_path = future.result()
+        bundle_mtime = os.path.getmtime(bundle_path)
+        bundle = install_models(load_model_bundle(bundle_path))
+        _bundle_state['mtime'] = bundle_mtime
+        job.update(status='completed', accuracy=bundle.accuracy, generation=bundle.generation,
+                   n_samples=bundle.metadata.get('n_samples'), dataset=bundle.metadata.get('dataset'),
+                   incremental=bundle.metadata.get('incremental') if job['mode'] == 'incremental' else None,
+                   forest_params=bundle.metadata.get('forest_params'), timings=bundle.metadata.get('timings'))
+        logger.info(f"Retraining job {job['job_id']} completed, accuracy {bundle.accuracy:.4f}")
+    except Exception as e:
+        job.update(status='failed', error=str(e))
+        logger.error(f"Retraining job {job['job_id']} failed: {e}")
+    finally:
+        if job['profile_file']:
+            try:
+                profiler.record_training(job['profile_file'])
+            except Exception as e:
+                logger.error(f"Error reading training profile {job['profile_file']}: {e}")
+        job['finished_at'] = datetime.now().isoformat()
+        save_job_record(job)
+        release_bundle_lock(job['_lock'])
+        job['_done'].set()
+        executor.shutdown(wait=False)
+
+def save_job_record(job):
+    """Write a job's public status to RETRAIN_JOB_DIR, keeping the newest MAX_RETAINED_JOBS records"""
+    try:
+        os.makedirs(RETRAIN_JOB_DIR, exist_ok=True)
+        path = os.path.join(RETRAIN_JOB_DIR, f"{job['job_id']}.json")
+        with open(f"{path}.{os.getpid()}.tmp", 'w') as f:
+            json.dump(job_status(job), f, default=str)
+        os.replace(f"{path}.{os.getpid()}.tmp", path)
+
+        records = sorted((entry for entry in os.scandir(RETRAIN_JOB_DIR) if entry.name.endswith('.json')),
+                         key=lambda entry: entry.stat().st_mtime)
+        for entry in records[:-MAX_RETAINED_JOBS]:
+            os.remove(entry.path)
+    except OSError as e:
+        logger.error(f"Error saving retraining job record {job['job_id']}: {e}")
+
+def load_job_record(job_id):
+    """Status of a job started by another worker process, or None if unknown"""
+    if not job_id.isalnum():
+        return None
+    try:
+        with open(os.path.join(RETRAIN_JOB_DIR, f"{job_id}.json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+@app.before_request
+def refresh_models_if_changed():
+    """Pick up a bundle saved by another worker process, checked at most every BUNDLE_CHECK_SECONDS"""
+    now = time.monotonic()
+    if not BUNDLE_CHECK_SECONDS or now - _bundle_state['checked_at'] < BUNDLE_CHECK_SECONDS:
+        return
+    _bundle_state['checked_at'] = now
+
+    try:
+        bundle_mtime = os.path.getmtime(BUNDLE_PATH)
+    except OSError:
+        return
+
+    if _bundle_state['mtime'] is not None and bundle_mtime > _bundle_state['mtime']:
+        # Record first so concurrent requests do not reload the same file
+        _bundle_state['mtime'] = bundle_mtime
+        try:
+            install_models(load_model_bundle(BUNDLE_PATH))
+            logger.info(f"Reloaded models saved by another process from {BUNDLE_PATH}")
+        except Exception as e:
+            logger.error(f"Error reloading models: {e}")
+
+@app.before_request
+def refresh_catalog_if_changed():
+    """Reload the crop catalog file when it changes, checked at most every BUNDLE_CHECK_SECONDS"""
+    now = time.monotonic()
+    if not CROP_CATALOG_PATH or not BUNDLE_CHECK_SECONDS or now - _catalog_state['checked_at'] < BUNDLE_CHECK_SECONDS:
+        return
+    _catalog_state['checked_at'] = now
+
+    try:
+        catalog_mtime = os.path.getmtime(CROP_CATALOG_PATH)
+    except OSError:
+        return
+
+    if _catalog_state['mtime'] is not None and catalog_mtime > _catalog_state['mtime']:
+        _catalog_state['mtime'] = catalog_mtime
+        try:
+            load_crop_catalog()
+        except Exception as e:
+            logger.error(f"Error reloading crop catalog: {e}")
+
+@app.before_request
+def start_request_timer():
+    if metrics.enabled:
+        g.request_start = time.perf_counter()
+
+@app.before_request
+def start_request_profile():
+    """Profile a sampled request while the profiler is armed, or one that asks for it by header"""
+    forced = PROFILE_HEADER_ENABLED and request.headers.get(PROFILE_HEADER) == '1'
+    if profiler.armed or forced:
+        g.profile = profiler.start(request.path, forced)
+
+@app.teardown_request
+def finish_request_profile(exc):
+    # Runs after streamed responses finish, so their generators are profiled too
+    profile = g.pop('profile', None)
+    if profile is not None:
+        profiler.finish(profile)
+
+@app.after_request
+def record_request_metrics(response):
+    """Count every response and its latency by endpoint"""
+    start = g.pop('request_start', None)
+    if start is not None:
+        endpoint = request.endpoint or 'unmatched'
+        metrics.observe('ml_request_seconds', time.perf_counter() - start, endpoint=endpoint)
+        metrics.inc('ml_requests_total', endpoint=endpoint, status=response.status_code)
+        if response.status_code >= 400:
+            metrics.inc('ml_errors_total', endpoint=endpoint, status=response.status_code)
+    return response
+
+def job_status(job):
+    """Public view of a retraining job"""
+    return {key: value for key, value in job.items() if not key.startswith('_')}
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
@@ -279,27 +1168,351 @@ def health_check():
         'status': 'healthy',
         'service': 'AI Crop Recommendation ML Service',
         'version': model_version,
-        'model_loaded': crop_model is not None,
+        'model_loaded': model_bundle is not None,
+        'startup_seconds': startup_info.get('seconds'),
         'timestamp': datetime.now().isoformat()
     }), 200
 
 @app.route('/model/info', methods=['GET'])
 def model_info():
     """Get model information"""
+    bundle = model_bundle
     return jsonify({
         'model_version': model_version,
-        'accuracy': model_accuracy,
-        'features': ['N', 'P', 'K', 'temperature', 'humidity', 'ph', 'rainfall'],
-        'supported_crops': list(CROP_DATABASE.keys()),
+        'accuracy': bundle.accuracy if bundle else 0.0,
+        'features': FEATURE_COLUMNS,
+        'supported_crops': bundle.label_encoder.classes_.tolist() if bundle else [],
         'algorithm': 'Random Forest',
-        'training_date': datetime.now().isoformat()
+        'inference_engine': 'compiled' if bundle and bundle.crop_engine is not None else 'sklearn',
+        'generation': bundle.generation if bundle else 0,
+        'training_date': bundle.trained_at if bundle else None,
+        'training': bundle.metadata if bundle else {},
+        'startup': startup_info,
+        'feedback': {
+            'records': len(feedback_log),
+            'incorporated': bundle.metadata.get('feedback_offset', 0) if bundle else 0,
+            'replay_rows': len(bundle.replay[1]) if bundle and bundle.replay is not None else 0
+        },
+        'climate_tiles': {
+            'fields': climate_tiles.fields,
+            'seasons': climate_tiles.seasons,
+            'bounds': climate_tiles.bounds,
+            'step_degrees': climate_tiles.step,
+            'bytes': climate_tiles.nbytes
+        } if climate_tiles is not None else None,
+        'crop_catalog': {
+            'entries': len(crop_catalog),
+            'regions': [region for region in crop_catalog.region_names if region],
+            'version': crop_catalog.version,
+            'source': crop_catalog.source
+        },
+        'suitability_grid': {
+            'axes': suitability_grid.axes,
+            'bytes': suitability_grid.nbytes,
+            'error_report': suitability_grid.report
+        } if suitability_grid is not None else None
     }), 200
 
+def requested_sections(data):
+    """PREDICT_SECTIONS named by the fields (or include) option of the body or query string, all by default"""
+    fields = data.get('fields', data.get('include', request.args.get('fields', request.args.get('include'))))
+    if fields is None:
+        return PREDICT_SECTIONS
+    if isinstance(fields, str):
+        fields = [field.strip() for field in fields.split(',') if field.strip()]
+    if not isinstance(fields, list) or not all(isinstance(field, str) for field in fields):
+        raise ValueError('fields must be a list or comma-separated string of section names')
+
+    unknown = sorted(set(fields) - set(PREDICT_SECTIONS))
+    if unknown:
+        raise ValueError(f"Unknown fields {unknown}; choose from {list(PREDICT_SECTIONS)}")
+    return tuple(section for section in PREDICT_SECTIONS if section in fields)
+
+def requested_region(data):
+    """Lower-cased region named by a request, selecting regional catalog entries, or None"""
+    region = data.get('region')
+    if region is None or region == '':
+        return None
+    if not isinstance(region, str):
+        raise ValueError('region must be a string')
+    return region.strip().lower()
+
+def location_features(data):
+    """Feature values at the record's lat/lon from the climate tiles; empty without either"""
+    tiles = climate_tiles
+    if tiles is None or data.get('lat') is None or data.get('lon') is None:
+        return {}
+
+    lat, lon = float(data['lat']), float(data['lon'])
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        raise ValueError('lat and lon must be valid coordinates')
+    season = data.get('season')
+    return tiles.lookup(lat, lon, season.strip().lower() if isinstance(season, str) else None,
+                        CLIMATE_TILES_INTERPOLATE)
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+def _is_blank(value):
+    return value is None or isinstance(value, str) and not value.strip()
+
+def coerce_feature_value(value):
+    """A raw request value as (float, blank). The field rule of every endpoint and upload format: null,
+    '' and whitespace are blank and take defaults (callers read absent keys and null cells as blank
+    too); anything else that is not a number becomes NaN and is rejected"""
+    if _is_blank(value):
+        return np.nan, True
+    return _to_float(value), False
+
+def coerce_feature_values(values):
+    """coerce_feature_value over a column of raw values, as a float array and a blank mask"""
+    if not isinstance(values, np.ndarray):
+        # fromiter keeps list or dict values as single (invalid) entries instead of another dimension
+        values = np.fromiter(values, dtype=object, count=len(values))
+    try:
+        # Numbers, numeric strings and None only, the common case, converted in one pass (None to NaN)
+        numbers = values.astype(np.float64)
+    except (TypeError, ValueError):
+        pass
+    else:
+        blank = np.zeros(len(values), dtype=bool)
+        unknown = np.flatnonzero(np.isnan(numbers))
+        blank[unknown] = [values[i] is None for i in unknown.tolist()]
+        return numbers, blank
+
+    coerced = [coerce_feature_value(value) for value in values]
+    return (np.fromiter((number for number, _ in coerced), dtype=np.float64, count=len(coerced)),
+            np.fromiter((is_blank for _, is_blank in coerced), dtype=bool, count=len(coerced)))
+
+def parse_feature_record(data):
+    """Extract the model feature vector from a request record, filling blanks from its location, then
+    defaults; raises ValueError for values that are not finite numbers"""
+    features = []
+    located = None
+    for feature in REQUEST_FEATURES:
+        value, blank = coerce_feature_value(data.get(feature))
+        if not blank:
+            if not math.isfinite(value):
+                raise ValueError('Feature values must be finite numbers')
+            features.append(value)
+            continue
+
+        if located is None:
+            located = location_features(data)
+        if feature in located:
+            features.append(located[feature])
+            metrics.inc('ml_location_filled_features_total', feature=feature)
+        else:
+            # Use default values if missing
+            features.append(FEATURE_DEFAULTS[feature])
+            metrics.inc('ml_default_filled_features_total', feature=feature)
+    return features
+
+def quantize_features(features):
+    """Integer FEATURE_QUANTA step of every feature, for cache keys; the features are left as given"""
+    return tuple(int(round(value / quantum)) for value, quantum in zip(features, FEATURE_QUANTA))
+
+def build_feature_matrix(records):
+    """Build an (n_records x n_features) matrix from request records, filling defaults"""
+    if not all(isinstance(record, dict) for record in records):
+        raise TypeError('Each record must be a JSON object')
+
+    X = np.empty((len(records), len(REQUEST_FEATURES)), dtype=np.float64)
+    for j, feature in enumerate(REQUEST_FEATURES):
+        X[:, j], blank = coerce_feature_values([record.get(feature) for record in records])
+        fill_defaults(X, j, blank)
+
+    invalid_rows = np.flatnonzero(~np.isfinite(X).all(axis=1))
+    if len(invalid_rows):
+        raise ValueError(f"Non-numeric or missing values in records: {invalid_rows[:10].tolist()}")
+
+    return X
+
+def open_csv_reader(stream, chunk_rows):
+    """Chunked CSV reader over an upload stream; reads only the header until iterated"""
+    return pd.read_csv(stream, chunksize=chunk_rows, dtype=str, keep_default_na=False,
+                       skipinitialspace=True)
+
+def frame_feature_matrix(frame):
+    """Feature matrix for a DataFrame of request columns; blank and null cells take defaults, unparseable ones are NaN"""
+    X = np.empty((len(frame), len(REQUEST_FEATURES)), dtype=np.float64)
+    for j, feature in enumerate(REQUEST_FEATURES):
+        if feature not in frame:
+            X[:, j] = np.nan
+            fill_defaults(X, j, np.ones(len(frame), dtype=bool))
+            continue
+
+        values = frame[feature].to_numpy(dtype=object, copy=True)
+        values[pd.isna(values)] = None  # Null Parquet cells are blank, like empty CSV cells
+        X[:, j], blank = coerce_feature_values(values)
+        fill_defaults(X, j, blank)
+
+    return X
+
+def fill_defaults(X, j, blank):
+    """Set the blank entries of feature column j to the feature's default and count them"""
+    if blank.any():
+        feature = REQUEST_FEATURES[j]
+        X[blank, j] = FEATURE_DEFAULTS[feature]
+        metrics.inc('ml_default_filled_features_total', int(blank.sum()), feature=feature)
+
+def iter_csv_chunks(reader):
+    """Parse CSV chunks into (ids, X); empty cells take defaults, unparseable rows are NaN"""
+    for chunk in reader:
+        ids = chunk['id'].tolist() if 'id' in chunk else None
+        yield ids, frame_feature_matrix(chunk)
+
+def iter_ndjson_chunks(stream, chunk_rows):
+    """Parse an NDJSON upload line by line into (ids, X) chunks; malformed lines are NaN rows"""
+    records = []
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        records.append(record if isinstance(record, dict) else None)
+        if len(records) == chunk_rows:
+            yield ndjson_chunk(records)
+            records = []
+
+    if records:
+        yield ndjson_chunk(records)
+
+def ndjson_chunk(records):
+    """Feature matrix and ids for parsed NDJSON records, None standing for a malformed line"""
+    X = np.empty((len(records), len(REQUEST_FEATURES)), dtype=np.float64)
+    for j, feature in enumerate(REQUEST_FEATURES):
+        X[:, j], blank = coerce_feature_values(
+            [record.get(feature) if record is not None else np.nan for record in records])
+        fill_defaults(X, j, blank)
+
+    ids = [record.get('id') if record is not None else None for record in records]
+    return ids, X
+
+def score_feature_matrix(bundle, X, histogram='ml_predict_stage_seconds', predict_yield=True):
+    """Scale X and run both forests of a bundle once over the whole matrix (the yield forest only if asked)"""
+    start = time.perf_counter()
+    X_scaled = bundle.scaler.transform(X)
+    start = metrics.stage('scale', start, histogram)
+
+    if bundle.crop_engine is not None and len(X_scaled) <= COMPILED_ENGINE_MAX_ROWS:
+        crop_model, yield_model = bundle.crop_engine, bundle.yield_engine
+    else:
+        crop_model, yield_model = bundle.crop_model, bundle.yield_model
+
+    crop_probabilities = crop_model.predict_proba(X_scaled)
+    start = metrics.stage('predict_proba', start, histogram)
+    if not predict_yield:
+        return crop_probabilities, None
+    predicted_yield = yield_model.predict(X_scaled)
+    metrics.stage('yield_predict', start, histogram)
+    return crop_probabilities, predicted_yield
+
+def score_micro_batch(items):
+    """Recommendations for (bundle, feature row, region) items queued by concurrent /predict calls, one pass per bundle and region"""
+    results = [None] * len(items)
+    groups = {}
+    for i, (bundle, _, region) in enumerate(items):
+        groups.setdefault((id(bundle), region), (bundle, region, []))[2].append(i)
+
+    # Requests straddling a model swap carry different bundles
+    for bundle, region, indices in groups.values():
+        X = np.array([items[i][1] for i in indices], dtype=np.float64)
+        scoring_start = time.perf_counter()
+        crop_probabilities, _ = score_feature_matrix(bundle, X, predict_yield=False)
+        start = time.perf_counter()
+        submit_shadow(bundle, X, crop_probabilities, start - scoring_start)
+        recommendations = build_recommendations(bundle, X, crop_probabilities, region)
+        metrics.stage('recommendations', start)
+        for j, i in enumerate(indices):
+            results[i] = recommendations[j]
+
+    return results
+
+def submit_shadow(bundle, X, crop_probabilities, primary_seconds):
+    """Hand a sampled primary scoring to the shadow bundle, if one is loaded; never waits for it"""
+    shadow = shadow_scorer
+    if shadow is not None and shadow.sampled():
+        shadow.submit(bundle.label_encoder.classes_, X, crop_probabilities, primary_seconds)
+
+def score_shadow(bundle, X):
+    """Crop probabilities of the shadow bundle, timed under its own metric"""
+    return score_feature_matrix(bundle, X, 'ml_shadow_stage_seconds', predict_yield=False)[0]
+
+def rank_crops(bundle, X, crop_probabilities, top_k=TOP_K_CROPS, region=None, catalog=None):
+    """Top crop classes per row of X with their probabilities, suitability factors and adjusted yields"""
+    # Catalog rows of the model's classes only, so the cost does not grow with the catalog
+    catalog = crop_catalog if catalog is None else catalog
+    class_rows = catalog.class_rows(bundle.label_encoder.classes_.tolist(), region, default='rice')
+
+    # Stable sort keeps class order for tied probabilities, like list.sort does
+    top_index = np.argsort(-crop_probabilities, axis=1, kind='stable')[:, :top_k]
+    top_probabilities = np.take_along_axis(crop_probabilities, top_index, axis=1)
+
+    # Adjust yield based on conditions
+    suitability = suitability_matrix(X[:, 5], X[:, 3], X[:, 4], X[:, 6], catalog.bounds[class_rows])
+    yield_factors = np.take_along_axis(suitability, top_index, axis=1)
+    adjusted_yield = catalog.base_yield[class_rows][top_index] * yield_factors
+
+    return top_index, top_probabilities, yield_factors, adjusted_yield
+
+def build_recommendations(bundle, X, crop_probabilities, region=None):
+    """Build the top crop recommendations for every row of X with array operations"""
+    crop_classes = bundle.label_encoder.classes_.tolist()
+    catalog = crop_catalog
+    static_fields = [catalog.static_fields(row) for row in catalog.class_rows(crop_classes, region, default='rice')]
+    top_index, top_probabilities, yield_factors, adjusted_yield = rank_crops(
+        bundle, X, crop_probabilities, region=region, catalog=catalog)
+
+    keep = (top_probabilities >= MIN_CROP_PROBABILITY).tolist()
+    top_index = top_index.tolist()
+    top_probabilities = top_probabilities.tolist()
+    yield_value = np.round(adjusted_yield, 2).tolist()
+    yield_min = np.round(adjusted_yield * 0.8, 2).tolist()
+    yield_max = np.round(adjusted_yield * 1.2, 2).tolist()
+    suitability_score = np.round(yield_factors * 100, 1).tolist()
+
+    results = []
+    for row in range(len(top_index)):
+        recommendations = []
+        for i, class_index in enumerate(top_index[row]):
+            if not keep[row][i]:  # Skip very low probability crops
+                continue
+
+            recommendation = {
+                'crop': crop_classes[class_index],
+                'confidence': top_probabilities[row][i],
+                'rank': i + 1,
+                'yield_prediction': {
+                    'value': yield_value[row][i],
+                    'unit': 'tonnes/hectare',
+                    'min': yield_min[row][i],
+                    'max': yield_max[row][i]
+                },
+                'suitability_score': suitability_score[row][i]
+            }
+            recommendation.update(static_fields[class_index])
+            recommendations.append(recommendation)
+        results.append(recommendations)
+
+    return results
+
+micro_batcher = MicroBatcher(
+    score_micro_batch, window_ms=MICRO_BATCH_WINDOW_MS, max_batch_size=MICRO_BATCH_MAX_SIZE
+) if MICRO_BATCHING else None
+
 @app.route('/predict', methods=['POST'])
 def predict_crop():
     """Main prediction endpoint"""
     try:
-        if crop_model is None or yield_model is None:
+        start = time.perf_counter()
+        bundle = model_bundle
+        if bundle is None:
             return jsonify({
                 'error': 'Models not loaded',
                 'message': 'ML models are not properly initialized'
@@ -308,77 +1521,80 @@ def predict_crop():
         data = request.get_json()
         if not data:
             return jsonify({'error': 'No input data provided'}), 400
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Invalid input data format', 'message': 'Request body must be a JSON object'}), 400
 
-        # Extract and validate input features
-        required_features = ['nitrogen', 'phosphorus', 'potassium', 'temperature', 'humidity', 'ph', 'rainfall']
-
+        # Extract and validate input features and the requested response sections
         try:
-            features = []
-            for feature in required_features:
-                if feature in data:
-                    features.append(float(data[feature]))
-                else:
-                    # Use default values if missing
-                    defaults = {
-                        'nitrogen': 50, 'phosphorus': 40, 'potassium': 35,
-                        'temperature': 25, 'humidity': 70, 'ph': 6.5, 'rainfall': 800
-                    }
-                    features.append(defaults[feature])
-
+            features = parse_feature_record(data)
+            region = requested_region(data)
         except (ValueError, TypeError):
             return jsonify({'error': 'Invalid input data format'}), 400
+        # The models cannot score NaN or infinity, and a micro-batch would fail for every request in it
+        if not np.isfinite(features).all():
+            return jsonify({'error': 'Invalid input data format'}), 400
+        try:
+            sections = requested_sections(data)
+        except ValueError as e:
+            return jsonify({'error': 'Invalid fields', 'message': str(e)}), 400
+        timestamp = datetime.now().isoformat()
+
+        # Serve the model sections of repeated inputs from the cache, keyed on quantized features,
+        # sections, region, model generation and catalog version. Sections derived from the inputs
+        # themselves are rebuilt from this request's values on every call
+        cache_key = None
+        if prediction_cache is not None:
+            try:
+                catalog = crop_catalog
+                cache_key = (bundle.generation, catalog.version, catalog.region_key(region),
+                             quantize_features(features), sections)
+            except (ValueError, OverflowError):
+                pass  # Non-finite input, score it uncached
+
+        start = metrics.stage('parse', start)
+
+        cached = None
+        if prediction_cache is not None:
+            cached = prediction_cache.get(cache_key) if cache_key is not None else None
+            start = metrics.stage('cache', start)
+
+        if cached is None:
+            cached = {}
+
+            # Scale features, get crop probabilities and create recommendations (top 5 crops by
+            # probability); the yield forest is not needed, recommendations carry rule-based yields
+            if 'recommendations' in sections:
+                if micro_batcher is not None:
+                    cached['recommendations'] = micro_batcher.submit((bundle, features, region))
+                    start = metrics.stage('micro_batch', start)
+                else:
+                    X = np.array([features], dtype=np.float64)
+                    scoring_start = time.perf_counter()
+                    crop_probabilities, _ = score_feature_matrix(bundle, X, predict_yield=False)
+                    start = time.perf_counter()
+                    submit_shadow(bundle, X, crop_probabilities, start - scoring_start)
+                    cached['recommendations'] = build_recommendations(bundle, X, crop_probabilities, region)[0]
+                    start = metrics.stage('recommendations', start)
+
+            if 'model_info' in sections:
+                cached['model_info'] = {
+                    'version': model_version,
+                    'algorithm': 'Random Forest',
+                    'accuracy': round(bundle.accuracy, 4),
+                    'training_date': bundle.trained_at
+                }
 
-        # Scale features
-        features_scaled = scaler.transform([features])
-
-        # Get crop predictions with probabilities
-        crop_probabilities = crop_model.predict_proba(features_scaled)[0]
-        crop_classes = label_encoder.classes_
-
-        # Get yield prediction
-        predicted_yield = yield_model.predict(features_scaled)[0]
-
-        # Create recommendations
-        recommendations = []
-
-        # Sort crops by probability (top 5)
-        crop_prob_pairs = list(zip(crop_classes, crop_probabilities))
-        crop_prob_pairs.sort(key=lambda x: x[1], reverse=True)
-
-        for i, (crop, probability) in enumerate(crop_prob_pairs[:5]):
-            if probability < 0.1:  # Skip very low probability crops
-                continue
-
-            crop_info = CROP_DATABASE.get(crop, CROP_DATABASE['rice'])
-
-            # Adjust yield based on conditions
-            yield_factor = calculate_yield_factor(crop, features[5], features[3], features[4], features[6])
-            adjusted_yield = np.mean(crop_info['yield_range']) * yield_factor
+            if cache_key is not None:
+                prediction_cache.put(cache_key, cached)
+                start = metrics.stage('cache_store', start)
 
-            recommendation = {
-                'crop': crop,
-                'confidence': float(probability),
-                'rank': i + 1,
-                'yield_prediction': {
-                    'value': round(adjusted_yield, 2),
-                    'unit': 'tonnes/hectare',
-                    'min': round(adjusted_yield * 0.8, 2),
-                    'max': round(adjusted_yield * 1.2, 2)
-                },
-                'suitability_score': round(yield_factor * 100, 1),
-                'season': crop_info['season'],
-                'duration_days': crop_info['duration'],
-                'market_price_per_quintal': crop_info['market_price']
-            }
-            recommendations.append(recommendation)
+        response = {'success': True}
+        recommendations = cached.get('recommendations')
+        if recommendations is not None:
+            response['recommendations'] = recommendations
 
-        # Calculate risk factors
-        risk_factors = calculate_risks(features, recommendations[0]['crop'] if recommendations else 'rice')
-
-        response = {
-            'success': True,
-            'recommendations': recommendations,
-            'input_analysis': {
+        if 'input_analysis' in sections:
+            response['input_analysis'] = {
                 'soil_ph': {
                     'value': features[5],
                     'status': get_ph_status(features[5])
@@ -393,29 +1609,203 @@ def predict_crop():
                     'humidity': features[4],
                     'rainfall': features[6]
                 }
-            },
-            'risk_factors': risk_factors,
+            }
+
+        # Calculate risk factors
+        if 'risk_factors' in sections:
+            response['risk_factors'] = calculate_risks(features, recommendations[0]['crop'] if recommendations else None)
+            start = metrics.stage('risks', start)
+
+        if 'model_info' in cached:
+            response['model_info'] = cached['model_info']
+
+        response = jsonify(dict(response, timestamp=timestamp))
+        metrics.stage('serialize', start)
+
+        if recommendations is not None:
+            logger.info(f"Prediction completed successfully. Top recommendation: {recommendations[0]['crop'] if recommendations else 'None'}")
+
+        return response, 200
+
+    except Exception as e:
+        logger.error(f"Prediction error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': 'Internal server error during prediction',
+            'message': str(e)
+        }), 500
+
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    """Batch prediction endpoint: scores an array of records in one pass"""
+    try:
+        start = time.perf_counter()
+        bundle = model_bundle
+        if bundle is None:
+            return jsonify({
+                'error': 'Models not loaded',
+                'message': 'ML models are not properly initialized'
+            }), 500
+
+        data = request.get_json()
+        records = data.get('records') if isinstance(data, dict) else data
+        if not records or not isinstance(records, list):
+            return jsonify({'error': 'No input records provided'}), 400
+
+        if len(records) > MAX_BATCH_SIZE:
+            return jsonify({
+                'error': 'Batch too large',
+                'message': f"At most {MAX_BATCH_SIZE} records are accepted per request"
+            }), 413
+
+        try:
+            X = build_feature_matrix(records)
+        except (ValueError, TypeError) as e:
+            return jsonify({'error': 'Invalid input data format', 'message': str(e)}), 400
+        metrics.stage('parse', start, 'ml_batch_stage_seconds')
+
+        # One scaler, classifier and regressor call for the whole batch
+        crop_probabilities, predicted_yield = score_feature_matrix(bundle, X, 'ml_batch_stage_seconds')
+        start = time.perf_counter()
+        recommendations = build_recommendations(bundle, X, crop_probabilities)
+        start = metrics.stage('recommendations', start, 'ml_batch_stage_seconds')
+        risk_factors = calculate_risks_batch(X)
+        start = metrics.stage('risks', start, 'ml_batch_stage_seconds')
+        predicted_yield = np.round(predicted_yield, 2).tolist()
+
+        results = [
+            {
+                'recommendations': recommendations[row],
+                'predicted_yield': predicted_yield[row],
+                'risk_factors': risk_factors[row]
+            }
+            for row in range(len(X))
+        ]
+
+        logger.info(f"Batch prediction completed successfully for {len(results)} records")
+
+        response = jsonify({
+            'success': True,
+            'count': len(results),
+            'results': results,
             'model_info': {
                 'version': model_version,
                 'algorithm': 'Random Forest',
-                'accuracy': round(model_accuracy, 4),
-                'training_date': datetime.now().isoformat()
+                'accuracy': round(bundle.accuracy, 4)
             },
             'timestamp': datetime.now().isoformat()
+        })
+        metrics.stage('serialize', start, 'ml_batch_stage_seconds')
+        return response, 200
+
+    except Exception as e:
+        logger.error(f"Batch prediction error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': 'Internal server error during batch prediction',
+            'message': str(e)
+        }), 500
+
+def score_stream(bundle, chunks):
+    """Score parsed upload chunks, yielding NDJSON result lines and a progress line per chunk"""
+    started = time.perf_counter()
+    rows = errors = 0
+
+    def progress():
+        elapsed = time.perf_counter() - started
+        return {
+            'rows': rows,
+            'errors': errors,
+            'elapsed_seconds': round(elapsed, 3),
+            'rows_per_second': round(rows / elapsed, 1) if elapsed else 0.0
         }
 
-        logger.info(f"Prediction completed successfully. Top recommendation: {recommendations[0]['crop'] if recommendations else 'None'}")
+    try:
+        for chunk_number, (ids, X) in enumerate(chunks, 1):
+            valid = np.isfinite(X).all(axis=1)
+            valid_rows = np.flatnonzero(valid)
+            if len(valid_rows):
+                X_valid = X[valid_rows]
+                crop_probabilities, predicted_yield = score_feature_matrix(bundle, X_valid, 'ml_stream_stage_seconds')
+                start = time.perf_counter()
+                recommendations = build_recommendations(bundle, X_valid, crop_probabilities)
+                start = metrics.stage('recommendations', start, 'ml_stream_stage_seconds')
+                risk_factors = calculate_risks_batch(X_valid)
+                start = metrics.stage('risks', start, 'ml_stream_stage_seconds')
+                predicted_yield = np.round(predicted_yield, 2).tolist()
+
+            lines = []
+            k = 0
+            for i, is_valid in enumerate(valid.tolist()):
+                line = {'row': rows + i}
+                if ids is not None:
+                    line['id'] = ids[i]
+                if is_valid:
+                    line.update(recommendations=recommendations[k], predicted_yield=predicted_yield[k],
+                                risk_factors=risk_factors[k])
+                    k += 1
+                else:
+                    line['error'] = 'Invalid input data format'
+                lines.append(json.dumps(line, separators=(',', ':')))
+
+            rows += len(X)
+            errors += len(X) - len(valid_rows)
+            metrics.inc('ml_stream_rows_total', len(valid_rows), status='scored')
+            metrics.inc('ml_stream_rows_total', len(X) - len(valid_rows), status='rejected')
 
-        return jsonify(response), 200
+            output = '\n'.join(lines) + '\n'
+            if len(valid_rows):
+                metrics.stage('serialize', start, 'ml_stream_stage_seconds')
 
+            yield output
+            yield json.dumps({'progress': dict(progress(), chunks=chunk_number)}) + '\n'
     except Exception as e:
-        logger.error(f"Prediction error: {str(e)}")
+        # Headers are already sent, so the failure is reported in the stream itself
+        logger.error(f"Stream scoring error after {rows} rows: {str(e)}")
+        yield json.dumps({'error': 'Stream scoring failed', 'message': str(e), 'rows': rows}) + '\n'
+        return
+
+    summary = dict(progress(), model_version=model_version, model_generation=bundle.generation)
+    logger.info(f"Stream scoring completed: {rows} rows, {errors} rejected, {summary['rows_per_second']} rows/s")
+    yield json.dumps({'summary': summary}) + '\n'
+
+@app.route('/predict/stream', methods=['POST'])
+def predict_stream():
+    """Bulk scoring endpoint: reads a CSV or NDJSON upload in chunks and streams NDJSON results"""
+    bundle = model_bundle
+    if bundle is None:
         return jsonify({
-            'success': False,
-            'error': 'Internal server error during prediction',
-            'message': str(e)
+            'error': 'Models not loaded',
+            'message': 'ML models are not properly initialized'
         }), 500
 
+    upload_format = request.args.get('format') or STREAM_FORMATS.get(request.mimetype)
+    if upload_format not in ('csv', 'ndjson'):
+        return jsonify({
+            'error': 'Unsupported upload format',
+            'message': 'Send text/csv or application/x-ndjson, or pass ?format=csv|ndjson'
+        }), 415
+
+    try:
+        chunk_rows = int(request.args.get('chunk_rows', STREAM_CHUNK_ROWS))
+    except ValueError:
+        chunk_rows = 0
+    if chunk_rows < 1:
+        return jsonify({'error': 'chunk_rows must be a positive integer'}), 400
+
+    # Read from the request body stream, never buffering the whole upload
+    if upload_format == 'csv':
+        try:
+            chunks = iter_csv_chunks(open_csv_reader(request.stream, chunk_rows))
+        except (ValueError, pd.errors.EmptyDataError) as e:
+            return jsonify({'error': 'Invalid input data format', 'message': str(e)}), 400
+    else:
+        chunks = iter_ndjson_chunks(request.stream, chunk_rows)
+
+    response = Response(stream_with_context(score_stream(bundle, chunks)), mimetype='application/x-ndjson')
+    response.headers['X-Accel-Buffering'] = 'no'  # Let nginx pass results through as they are produced
+    return response
+
 def get_ph_status(ph):
     """Get pH status description"""
     if ph < 5.5:
@@ -489,26 +1879,633 @@ def calculate_risks(features, top_crop):
 
     return risks
 
+# calculate_risks results for every combination of temperature, rainfall and pH
+# risk bands, indexed by the codes computed in calculate_risks_batch
+RISK_TABLE = [
+    calculate_risks([0, 0, 0, temperature, 0, ph, rainfall], None)
+    for temperature in (25, 40, 5)
+    for rainfall in (800, 100, 3000)
+    for ph in (6.5, 4.0)
+]
+
+def risk_band_code(condition, values):
+    """RISK_TABLE band of one condition, 0 when calculate_risks raises nothing for it"""
+    values = np.asarray(values, dtype=np.float64)
+    if condition == 'temp':
+        return np.select([values > 35, values < 10], [1, 2], 0)
+    if condition == 'rainfall':
+        return np.select([values < 300, values > 2000], [1, 2], 0)
+    if condition == 'ph':
+        return ((values < 5.0) | (values > 8.0)).astype(np.int64)
+    return np.zeros(values.shape, dtype=np.int64)
+
+def risk_table_index(temperature_code, rainfall_code, ph_code):
+    return (temperature_code * 3 + rainfall_code) * 2 + ph_code
+
+def calculate_risks_batch(X):
+    """Calculate risk factors for every row of X from band codes and RISK_TABLE"""
+    codes = risk_table_index(risk_band_code('temp', X[:, 3]), risk_band_code('rainfall', X[:, 6]),
+                             risk_band_code('ph', X[:, 5]))
+    return [RISK_TABLE[code] for code in codes.tolist()]
+
+# get_ph_status results indexed by ph_status_code
+PH_STATUSES = [get_ph_status(4.0), get_ph_status(9.0), get_ph_status(6.5)]
+
+def ph_status_code(ph):
+    return np.select([ph < 5.5, ph > 7.5], [0, 1], 2)
+
+def grid_band_codes(axis, points):
+    """Band code stored per grid point: the risk band, combined with the pH status on the pH axis"""
+    condition = CONDITION_RULES[axis][0]
+    codes = risk_band_code(condition, points)
+    if condition == 'ph':
+        codes = ph_status_code(points) * 2 + codes
+    return codes
+
+def build_suitability_grid(catalog=None):
+    """Tabulate every condition factor and band code on SUITABILITY_GRID_AXES"""
+    catalog = crop_catalog if catalog is None else catalog
+    return SuitabilityGrid.build(
+        SUITABILITY_GRID_AXES,
+        lambda condition, points: condition_factors(condition, points, catalog.bounds),
+        grid_band_codes,
+        catalog.name_list,
+        catalog.version
+    )
+
+def suitability_grid_report(grid, n_samples=20000, bundle=None, random_state=0, catalog=None):
+    """Error of grid lookups against the exact rule-based path (and the forests, given a bundle)"""
+    catalog = crop_catalog if catalog is None else catalog
+    n_samples = min(n_samples, max(1000, GRID_REPORT_MAX_CELLS // len(catalog)))
+    rng = np.random.default_rng(random_state)
+    values = np.column_stack([rng.uniform(start, start + step * (n_points - 1), n_samples)
+                              for _, start, step, n_points in grid.axes])
+    ph, temperature, humidity, rainfall = values.T
+
+    exact = suitability_matrix(ph, temperature, humidity, rainfall, catalog.bounds)
+    approximate, codes = grid.lookup_many(values)
+    score_error = np.abs(np.round(approximate * 100, 1) - np.round(exact * 100, 1))
+    exact_top = np.argsort(-exact, axis=1, kind='stable')[:, :TOP_K_CROPS]
+    approximate_top = np.argsort(-approximate, axis=1, kind='stable')[:, :TOP_K_CROPS]
+
+    exact_risk = risk_table_index(risk_band_code('temp', temperature), risk_band_code('rainfall', rainfall),
+                                  risk_band_code('ph', ph))
+    approximate_risk = risk_table_index(codes[:, 1], codes[:, 3], codes[:, 0] & 1)
+
+    report = {
+        'samples': n_samples,
+        'max_score_error': round(float(score_error.max()), 2),
+        'mean_score_error': round(float(score_error.mean()), 4),
+        'top1_agreement': round(float(np.mean(exact_top[:, 0] == approximate_top[:, 0])), 4),
+        'topk_agreement': round(float(np.mean((exact_top == approximate_top).all(axis=1))), 4),
+        'risk_agreement': round(float(np.mean(exact_risk == approximate_risk)), 4),
+        'ph_status_agreement': round(float(np.mean(ph_status_code(ph) == codes[:, 0] >> 1)), 4)
+    }
+
+    if bundle is not None:
+        # How often the rule-based top crop is also the classifier's, at default nutrients
+        X = np.empty((n_samples, len(REQUEST_FEATURES)), dtype=np.float64)
+        X[:, :3] = [FEATURE_DEFAULTS[feature] for feature in REQUEST_FEATURES[:3]]
+        X[:, 3], X[:, 4], X[:, 5], X[:, 6] = temperature, humidity, ph, rainfall
+        crop_probabilities, _ = score_feature_matrix(bundle, X)
+        model_top = bundle.label_encoder.classes_[np.argmax(crop_probabilities, axis=1)]
+        report['model_top1_agreement'] = round(float(np.mean(catalog.crops[approximate_top[:, 0]] == model_top)), 4)
+
+    return report
+
+def load_suitability_grid():
+    """Memory-map the saved grid, or tabulate one in memory, which takes milliseconds"""
+    global suitability_grid
+    catalog = crop_catalog
+    n_points = sum(int(round((stop - start) / step)) + 1 for _, start, stop, step in SUITABILITY_GRID_AXES)
+    if n_points * len(catalog) * 8 > SUITABILITY_GRID_MAX_MB * 1024 * 1024:
+        logger.warning(f"Suitability grid for {len(catalog)} catalog entries exceeds {SUITABILITY_GRID_MAX_MB} MB, "
+                       f"/predict/fast will use the exact rules")
+        suitability_grid = None
+        return None
+
+    grid = None
+    if os.path.exists(SUITABILITY_GRID_PATH):
+        try:
+            grid = SuitabilityGrid.load(SUITABILITY_GRID_PATH)
+            if grid.catalog_version != catalog.version:
+                logger.warning("Suitability grid was built for a different crop catalog, rebuilding it")
+                grid = None
+        except Exception as e:
+            logger.error(f"Error loading suitability grid: {e}")
+
+    if grid is None:
+        grid = build_suitability_grid(catalog)
+        grid.report = suitability_grid_report(grid, n_samples=5000, catalog=catalog)
+
+    suitability_grid = grid
+    return grid
+
+def decode_grid_codes(codes):
+    """Risk factors and pH status for the band codes of one grid lookup"""
+    ph_code, temperature_code, _, rainfall_code = codes
+    return RISK_TABLE[risk_table_index(temperature_code, rainfall_code, ph_code & 1)], PH_STATUSES[ph_code >> 1]
+
+@app.route('/predict/fast', methods=['POST'])
+def predict_fast():
+    """Approximate recommendations from the precomputed suitability grid, without the forests"""
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({'error': 'No input data provided'}), 400
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Invalid input data format', 'message': 'Request body must be a JSON object'}), 400
+
+    try:
+        features = parse_feature_record(data)
+        region = requested_region(data)
+    except (ValueError, TypeError):
+        return jsonify({'error': 'Invalid input data format'}), 400
+
+    conditions = [features[5], features[3], features[4], features[6]]
+    if not np.isfinite(conditions).all():
+        return jsonify({'error': 'Invalid input data format'}), 400
+
+    catalog = crop_catalog
+    grid = suitability_grid
+    if grid is not None and grid.catalog_version != catalog.version:
+        grid = load_suitability_grid()
+    found = grid.lookup(conditions) if grid is not None else None
+    if found is not None:
+        suitability, codes = found
+        risk_factors, ph_status = decode_grid_codes(codes)
+    else:
+        # Off the grid (or no grid): fall back to the exact rules, which are still cheap
+        suitability = suitability_matrix(*conditions, catalog.bounds)[0]
+        risk_factors, ph_status = calculate_risks(features, None), get_ph_status(features[5])
+
+    rows = catalog.region_rows(region) if catalog.region_key(region) else None
+    if rows is None:
+        top = top_k_indices(suitability, TOP_K_CROPS)
+    else:
+        top = rows[top_k_indices(suitability[rows], TOP_K_CROPS)]
+    scores = np.round(suitability[top] * 100, 1).tolist()
+    expected_yield = np.round(catalog.base_yield[top] * suitability[top], 2).tolist()
+
+    return jsonify({
+        'success': True,
+        'mode': 'approximate' if found is not None else 'exact',
+        'recommendations': [
+            {
+                'crop': catalog.name_list[i],
+                'rank': rank + 1,
+                'suitability_score': scores[rank],
+                'expected_yield': expected_yield[rank],
+                'season': catalog.static_fields(i)['season']
+            }
+            for rank, i in enumerate(top.tolist())
+        ],
+        'soil_ph_status': ph_status,
+        'risk_factors': risk_factors,
+        'timestamp': datetime.now().isoformat()
+    }), 200
+
+def shadow_info(shadow):
+    """Public description of a shadow scorer and its bundle"""
+    return {
+        'source': shadow.source,
+        'loaded_at': datetime.fromtimestamp(shadow.loaded_at).isoformat(),
+        'accuracy': shadow.bundle.accuracy,
+        'trained_at': shadow.bundle.trained_at,
+        'inference_engine': 'compiled' if shadow.bundle.crop_engine is not None else 'sklearn',
+        'compact': bool(shadow.bundle.crop_engine is not None and shadow.bundle.crop_engine.is_compact)
+    }
+
+@app.route('/shadow/load', methods=['POST'])
+def load_shadow():
+    """Load a bundle file from the model directory as the shadow of the active models"""
+    options = request.get_json(silent=True) or {}
+    path = options.get('path')
+    sample_rate = options.get('sample_rate', SHADOW_SAMPLE_RATE)
+    engine = options.get('engine', INFERENCE_ENGINE)
+    if not isinstance(path, str) or not path:
+        return jsonify({'error': 'path must name a bundle file in the model directory'}), 400
+    if isinstance(sample_rate, bool) or not isinstance(sample_rate, (int, float)) or not 0 <= sample_rate <= 1:
+        return jsonify({'error': 'sample_rate must be a number from 0 to 1'}), 400
+    if engine not in ('sklearn', 'compiled'):
+        return jsonify({'error': "engine must be 'sklearn' or 'compiled'"}), 400
+
+    full_path = resolve_under(MODEL_DIR, path)
+    if full_path is None:
+        return jsonify({'error': 'path must name a bundle file in the model directory'}), 400
+    if not os.path.isfile(full_path):
+        return jsonify({'error': 'Bundle not found'}), 404
+
+    try:
+        shadow = load_shadow_bundle(full_path, float(sample_rate), engine)
+    except Exception as e:
+        logger.error(f"Error loading shadow bundle: {e}")
+        return jsonify({'success': False, 'error': 'Invalid model bundle', 'message': str(e)}), 400
+
+    return jsonify({'success': True, 'shadow': shadow_info(shadow)}), 200
+
+@app.route('/shadow/stats', methods=['GET'])
+def shadow_stats():
+    """Agreement, probability drift and latency of the shadow bundle against the active one"""
+    shadow = shadow_scorer
+    if shadow is None:
+        return jsonify({'enabled': False}), 200
+
+    return jsonify({'enabled': True, 'shadow': shadow_info(shadow), 'stats': shadow.stats()}), 200
+
+@app.route('/shadow/unload', methods=['POST'])
+def unload_shadow():
+    """Stop shadow scoring and return the final comparison"""
+    shadow = unload_shadow_bundle()
+    if shadow is None:
+        return jsonify({'error': 'No shadow bundle loaded'}), 404
+
+    logger.info(f"Shadow bundle {shadow.source} unloaded")
+    return jsonify({'success': True, 'stats': shadow.stats()}), 200
+
+@app.route('/shadow/promote', methods=['POST'])
+def promote_shadow():
+    """Make the shadow bundle the active one: saved as the bundle file, then installed"""
+    shadow = shadow_scorer
+    if shadow is None:
+        return jsonify({'error': 'No shadow bundle loaded'}), 404
+    lock_file = None
+    if not any(job['status'] == 'running' for job in list(retrain_jobs.values())):
+        lock_file = acquire_bundle_lock()
+    if lock_file is None:
+        return jsonify({'error': 'A retraining job is running; promote after it finishes'}), 409
+
+    try:
+        # The replaced bundle is kept beside the new one for a rollback
+        if os.path.exists(BUNDLE_PATH):
+            os.replace(BUNDLE_PATH, BUNDLE_PATH + '.previous')
+        metadata = dict(shadow.bundle.metadata, promoted_from=shadow.source, promoted_at=datetime.now().isoformat())
+        bundle_path = save_model_bundle(shadow.bundle._replace(metadata=metadata))
+        bundle_mtime = os.path.getmtime(bundle_path)
+        bundle = install_models(load_model_bundle(bundle_path))
+        _bundle_state['mtime'] = bundle_mtime
+    except Exception as e:
+        logger.error(f"Error promoting shadow bundle: {e}")
+        return jsonify({'success': False, 'error': 'Promotion failed', 'message': str(e)}), 500
+    finally:
+        release_bundle_lock(lock_file)
+
+    stats = shadow.stats()
+    if shadow_scorer is shadow:
+        unload_shadow_bundle()
+    logger.info(f"Shadow bundle {shadow.source} promoted, generation {bundle.generation}")
+    return jsonify({'success': True, 'generation': bundle.generation, 'accuracy': bundle.accuracy,
+                    'stats': stats}), 200
+
+@app.route('/batcher/stats', methods=['GET'])
+def batcher_stats():
+    """Micro-batching settings and counters"""
+    if micro_batcher is None:
+        return jsonify({'enabled': False}), 200
+
+    return jsonify(dict(micro_batcher.stats(), enabled=True)), 200
+
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    """Prediction cache counters"""
+    if prediction_cache is None:
+        return jsonify({'enabled': False}), 200
+
+    return jsonify(dict(prediction_cache.stats(), enabled=True, model_generation=model_generation)), 200
+
+def service_samples():
+    """Model, training, cache and batcher readings exported alongside the recorded metrics"""
+    bundle = model_bundle
+    samples = [('ml_metrics_enabled', 'gauge', 'Whether request metrics are being recorded', int(metrics.enabled), {})]
+
+    if bundle is not None:
+        samples += [
+            ('ml_model_info', 'gauge', 'Active model version and engine', 1, {
+                'version': model_version,
+                'engine': 'compiled' if bundle.crop_engine is not None else 'sklearn',
+                'source': bundle.metadata.get('source', 'unknown')
+            }),
+            ('ml_model_generation', 'gauge', 'Model generation, incremented on every install', bundle.generation, {}),
+            ('ml_model_accuracy', 'gauge', 'Held-out accuracy of the crop classifier', bundle.accuracy, {}),
+            ('ml_model_training_samples', 'gauge', 'Rows the active models were trained on',
+             bundle.metadata.get('n_samples'), {})
+        ]
+        for stage, seconds in bundle.metadata.get('timings', {}).items():
+            samples.append(('ml_training_duration_seconds', 'gauge', 'Training time of the active models by stage',
+                            round(seconds, 4), {'stage': stage}))
+
+    samples.append(('ml_startup_seconds', 'gauge', 'Time taken to load or train models at startup',
+                    startup_info.get('seconds'), {}))
+    samples.append(('ml_retrain_jobs_running', 'gauge', 'Background retraining jobs in progress',
+                    sum(job['status'] == 'running' for job in list(retrain_jobs.values())), {}))
+
+    if prediction_cache is not None:
+        cache = prediction_cache.stats()
+        for key in ['hits', 'misses', 'evictions', 'expirations']:
+            samples.append((f'ml_prediction_cache_{key}_total', 'counter', f'Prediction cache {key}', cache[key], {}))
+        samples.append(('ml_prediction_cache_entries', 'gauge', 'Cached predictions', cache['entries'], {}))
+        samples.append(('ml_prediction_cache_bytes', 'gauge', 'Approximate size of cached predictions', cache['bytes'], {}))
+
+    samples.append(('ml_micro_batching_enabled', 'gauge', 'Whether /predict calls are micro-batched',
+                    int(micro_batcher is not None), {}))
+    if micro_batcher is not None:
+        batcher = micro_batcher.stats()
+        samples += [
+            ('ml_micro_batches_total', 'counter', 'Micro-batches scored', batcher['batches'], {}),
+            ('ml_micro_batch_rows_total', 'counter', 'Rows scored through micro-batches', batcher['rows'], {}),
+            ('ml_micro_batch_errors_total', 'counter', 'Micro-batches that failed', batcher['errors'], {}),
+            ('ml_micro_batch_queued', 'gauge', 'Requests waiting for a micro-batch', batcher['queued'], {}),
+            ('ml_micro_batch_window_seconds', 'gauge', 'Micro-batching window (ML_MICRO_BATCH_WINDOW_MS)',
+             batcher['window_ms'] / 1000, {}),
+            ('ml_micro_batch_max_size', 'gauge', 'Largest micro-batch allowed (ML_MICRO_BATCH_MAX_SIZE)',
+             batcher['max_batch_size'], {}),
+            ('ml_micro_batch_largest', 'gauge', 'Largest micro-batch scored so far', batcher['largest_batch'], {})
+        ]
+
+    return samples
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Metrics in the Prometheus text exposition format, for this worker process"""
+    return Response(metrics.render(service_samples()), mimetype='text/plain; version=0.0.4')
+
+@app.route('/metrics/toggle', methods=['POST'])
+def toggle_metrics():
+    """Switch metric recording on or off at runtime, optionally clearing what was recorded"""
+    options = request.get_json(silent=True) or {}
+    enabled = options.get('enabled')
+    if not isinstance(enabled, bool):
+        return jsonify({'error': 'enabled must be true or false'}), 400
+
+    metrics.enabled = enabled
+    if options.get('reset'):
+        metrics.reset()
+
+    logger.info(f"Request metrics {'enabled' if enabled else 'disabled'}")
+    return jsonify({'success': True, 'enabled': metrics.enabled}), 200
+
+@app.route('/profiling', methods=['GET'])
+def profiling_summary():
+    """Profiler state and the hottest functions of the profiled requests or training run"""
+    source = request.args.get('source', 'requests')
+    sort = request.args.get('sort', 'cumulative')
+    try:
+        top = int(request.args.get('top', 20))
+    except ValueError:
+        top = 0
+    if source not in ('requests', 'training') or sort not in SORT_KEYS or not 1 <= top <= 500:
+        return jsonify({'error': 'Invalid options',
+                        'message': f"source is requests or training, sort one of {', '.join(SORT_KEYS)}, top 1 to 500"}), 400
+
+    return jsonify({
+        'status': profiler.status(),
+        'source': source,
+        'sort': sort,
+        'functions': profiler.summary(source, top, sort)
+    }), 200
+
+@app.route('/profiling', methods=['POST'])
+def configure_profiling():
+    """Arm the profiler for a sampled fraction of requests and/or the next training run, or disarm it"""
+    options = request.get_json(silent=True) or {}
+    if options.get('enabled') is False:
+        profiler.disarm()
+        logger.info("Profiling disarmed")
+        return jsonify({'success': True, 'status': profiler.status()}), 200
+
+    sample_rate = options.get('sample_rate', 0.01)
+    max_requests = options.get('max_requests', 100)
+    path = options.get('path')
+    training = options.get('training', False)
+    if (not isinstance(sample_rate, (int, float)) or isinstance(sample_rate, bool) or not 0 <= sample_rate <= 1
+            or not isinstance(max_requests, int) or isinstance(max_requests, bool)
+            or not 0 <= max_requests <= MAX_PROFILE_REQUESTS
+            or not (path is None or isinstance(path, str)) or not isinstance(training, bool)):
+        return jsonify({'error': 'Invalid options',
+                        'message': f"sample_rate is 0 to 1, max_requests 0 to {MAX_PROFILE_REQUESTS}, "
+                                   f"path a string and training true or false"}), 400
+
+    profiler.arm(float(sample_rate), max_requests, path, training)
+    logger.info(f"Profiling armed: {sample_rate:.2%} of {path or 'all'} requests, up to {max_requests}"
+                f"{', and the next training run' if training else ''}")
+    return jsonify({'success': True, 'status': profiler.status()}), 200
+
+def parse_page_size(value, default):
+    """Page size from a request option, between 1 and MAX_CROP_PAGE_SIZE"""
+    limit = default if value is None else int(value)
+    if not 1 <= limit <= MAX_CROP_PAGE_SIZE:
+        raise ValueError(f"limit must be between 1 and {MAX_CROP_PAGE_SIZE}")
+    return limit
+
+def crop_database_page(catalog, region, offset, limit):
+    """Serialized /crops/database page, built once per catalog version and kept in _crop_pages"""
+    key = (catalog.version, region, offset, limit)
+    body = _crop_pages.get(key)
+    if body is None:
+        rows = catalog.region_rows(region) if region else np.arange(len(catalog))
+        page = rows[offset:offset + limit].tolist()
+        next_offset = offset + len(page)
+        body = app.json.dumps({
+            'crops': {catalog.name_list[row]: catalog.record(row) for row in page},
+            'total_crops': len(rows),
+            'offset': offset,
+            'limit': limit,
+            'next_offset': next_offset if next_offset < len(rows) else None,
+            'catalog_version': catalog.version
+        })
+        if len(_crop_pages) >= CROP_PAGE_CACHE_SIZE:
+            _crop_pages.clear()
+        _crop_pages[key] = body
+    return body
+
 @app.route('/crops/database', methods=['GET'])
 def get_crop_database():
-    """Get crop database information"""
+    """Get crop database information, one page of catalog entries at a time"""
+    try:
+        offset = int(request.args.get('offset', 0))
+        limit = parse_page_size(request.args.get('limit'), CROP_PAGE_SIZE)
+        region = requested_region(request.args)
+        if offset < 0:
+            raise ValueError('offset must not be negative')
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': 'Invalid page', 'message': str(e)}), 400
+
+    # Pages change only with the catalog, so clients revalidate with If-None-Match
+    catalog = crop_catalog
+    region = catalog.region_key(region)
+    response = Response(crop_database_page(catalog, region, offset, limit), mimetype='application/json')
+    response.set_etag(f"{catalog.version}-{region or ''}-{offset}-{limit}")
+    response.cache_control.public = True
+    response.cache_control.max_age = CROP_DATABASE_MAX_AGE
+    return response.make_conditional(request)
+
+@app.route('/crops/reload', methods=['POST'])
+def reload_crop_catalog():
+    """Reload the crop catalog file now instead of waiting for the change check"""
+    if not CROP_CATALOG_PATH:
+        return jsonify({'error': 'No crop catalog file', 'message': 'Set ML_CROP_CATALOG to load a catalog file'}), 400
+
+    try:
+        catalog = load_crop_catalog()
+    except Exception as e:
+        logger.error(f"Error reloading crop catalog: {e}")
+        return jsonify({'success': False, 'error': 'Invalid crop catalog', 'message': str(e)}), 400
+
+    return jsonify({'success': True, 'entries': len(catalog), 'version': catalog.version}), 200
+
+@app.route('/crops/suitability', methods=['POST'])
+def rank_crop_suitability():
+    """Rank every crop in the database by rule-based suitability for the given conditions"""
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({'error': 'No input data provided'}), 400
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Invalid input data format', 'message': 'Request body must be a JSON object'}), 400
+
+    try:
+        features = parse_feature_record(data)
+        region = requested_region(data)
+        limit = parse_page_size(data.get('top_k'), CROP_PAGE_SIZE)
+    except (ValueError, TypeError):
+        return jsonify({'error': 'Invalid input data format'}), 400
+
+    # Score the whole catalog (or region) with array operations, then order only the top entries
+    catalog = crop_catalog
+    region = catalog.region_key(region)
+    rows = catalog.region_rows(region) if region else np.arange(len(catalog))
+    bounds = catalog.bounds[rows] if region else catalog.bounds
+    yield_factors = suitability_matrix(features[5], features[3], features[4], features[6], bounds)[0]
+    top = top_k_indices(yield_factors, limit)
+    order = rows[top].tolist()
+    expected_yield = np.round(catalog.base_yield[rows[top]] * yield_factors[top], 2).tolist()
+    scores = np.round(yield_factors[top] * 100, 1).tolist()
+
     return jsonify({
-        'crops': CROP_DATABASE,
-        'total_crops': len(CROP_DATABASE)
+        'success': True,
+        'total_crops': len(rows),
+        'rankings': [
+            {
+                'crop': catalog.name_list[row],
+                'rank': rank + 1,
+                'suitability_score': scores[rank],
+                'expected_yield': expected_yield[rank],
+                'season': catalog.static_fields(row)['season']
+            }
+            for rank, row in enumerate(order)
+        ],
+        'timestamp': datetime.now().isoformat()
     }), 200
 
+def parse_feedback_record(record):
+    """Features, crop and yield of one /feedback record; raises ValueError if it is incomplete or implausible"""
+    features = []
+    for name, column in zip(REQUEST_FEATURES, FEATURE_COLUMNS):
+        value = float(record[name])
+        low, high = FEATURE_RANGES[column]
+        if not low <= value <= high:
+            raise ValueError(f"{name} must be between {low} and {high}")
+        features.append(value)
+
+    crop = str(record['crop']).strip().lower()
+    if not crop or len(crop.encode('utf-8')) > MAX_CROP_BYTES:
+        raise ValueError(f"crop must be a name of 1 to {MAX_CROP_BYTES} bytes")
+
+    observed_yield = record.get('yield')
+    observed_yield = np.nan if observed_yield is None else float(observed_yield)
+    if observed_yield < 0 or np.isinf(observed_yield):
+        raise ValueError('yield must be a non-negative number')
+    return features, crop, observed_yield
+
+@app.route('/feedback', methods=['POST'])
+def record_feedback():
+    """Append observed outcomes (crop actually grown, actual yield) to the feedback log"""
+    data = request.get_json(silent=True)
+    records = data.get('records') if isinstance(data, dict) and 'records' in data else [data]
+    if not isinstance(records, list) or not records or not all(isinstance(record, dict) for record in records):
+        return jsonify({'error': 'Provide one feedback record or {"records": [...]}'}), 400
+    if len(records) > MAX_FEEDBACK_RECORDS:
+        return jsonify({'error': f'At most {MAX_FEEDBACK_RECORDS} records per request'}), 400
+
+    try:
+        features, crops, yields = zip(*[parse_feedback_record(record) for record in records])
+    except (KeyError, TypeError, ValueError) as e:
+        message = f"Missing field {e}" if isinstance(e, KeyError) else str(e)
+        return jsonify({'error': 'Invalid feedback record', 'message': message}), 400
+
+    try:
+        total = feedback_log.append(np.array(features, dtype=np.float32), crops, yields)
+    except OSError as e:
+        logger.error(f"Feedback log error: {str(e)}")
+        return jsonify({'success': False, 'error': 'Failed to record feedback', 'message': str(e)}), 500
+
+    bundle = model_bundle
+    return jsonify({
+        'success': True,
+        'accepted': len(records),
+        'feedback_records': total,
+        'pending_records': total - (bundle.metadata.get('feedback_offset', 0) if bundle else 0),
+        'timestamp': datetime.now().isoformat()
+    }), 201
+
 @app.route('/retrain', methods=['POST'])
 def retrain_model():
-    """Retrain the model with new data"""
+    """Retrain the model with new data in a background process"""
     try:
+        options = request.get_json(silent=True) or {}
+        n_samples = options.get('n_samples')
+        if n_samples is not None and (not isinstance(n_samples, int) or n_samples < 100):
+            return jsonify({'error': 'n_samples must be an integer of at least 100'}), 400
+        tolerance = options.get('tolerance')
+        if tolerance is not None and (not isinstance(tolerance, (int, float)) or not 0 <= tolerance <= 1):
+            return jsonify({'error': 'tolerance must be a number between 0 and 1'}), 400
+
+        # Datasets are named relative to DATASET_DIR; their header is checked before the job starts
+        dataset_path = options.get('dataset_path')
+        if dataset_path is not None:
+            dataset_path = resolve_under(DATASET_DIR, dataset_path) if isinstance(dataset_path, str) else None
+            if dataset_path is None:
+                return jsonify({'error': 'dataset_path must name a file inside the dataset directory'}), 400
+            if not os.path.isfile(dataset_path):
+                return jsonify({'error': 'Dataset not found'}), 404
+            try:
+                dataset_format(dataset_path)
+                resolve_columns(read_header(dataset_path), FEATURE_COLUMNS, DATASET_ALIASES)
+            except (DatasetError, ValueError, OSError) as e:
+                return jsonify({'error': 'Invalid dataset', 'message': str(e)}), 400
+
+        # Incremental updates grow the active forests from feedback logged since their last update
+        mode = options.get('mode', 'full')
+        if mode not in ('full', 'incremental'):
+            return jsonify({'error': "mode must be 'full' or 'incremental'"}), 400
+        if mode == 'incremental':
+            bundle = model_bundle
+            if bundle is None or bundle.replay is None:
+                return jsonify({'error': 'The active models do not support incremental updates; run a full retrain'}), 409
+            if len(feedback_log) <= bundle.metadata.get('feedback_offset', 0):
+                return jsonify({'error': 'No new feedback since the last update'}), 409
+
         logger.info("Retraining models...")
-        train_models()
-        return jsonify({
-            'success': True,
-            'message': 'Models retrained successfully',
-            'new_accuracy': model_accuracy,
-            'timestamp': datetime.now().isoformat()
-        }), 200
+        job = submit_retrain_job(n_samples, options.get('parallel'), bool(options.get('tune')), tolerance,
+                                 dataset_path, mode == 'incremental')
+        if job is None:
+            return jsonify({
+                'success': False,
+                'error': 'Retraining already in progress'
+            }), 409
+        if job['status'] == 'failed':
+            return jsonify(dict(job_status(job), success=False, error='Failed to start retraining',
+                                message=job['error'])), 500
+
+        # Callers that need the old blocking behaviour can wait for the job
+        if options.get('wait'):
+            job['_done'].wait()
+            status = 200 if job['status'] == 'completed' else 500
+            return jsonify(dict(job_status(job), success=status == 200,
+                                new_accuracy=job.get('accuracy'),
+                                timestamp=datetime.now().isoformat())), status
+
+        return jsonify(dict(job_status(job), success=True,
+                            status_url=f"/retrain/{job['job_id']}",
+                            timestamp=datetime.now().isoformat())), 202
     except Exception as e:
         logger.error(f"Retraining error: {str(e)}")
         return jsonify({
@@ -517,16 +2514,67 @@ def retrain_model():
             'message': str(e)
         }), 500
 
+@app.route('/retrain/<job_id>', methods=['GET'])
+def retrain_status(job_id):
+    """Status of a background retraining job"""
+    job = retrain_jobs.get(job_id)
+    if job is not None:
+        return jsonify(job_status(job)), 200
+
+    # Started by another worker process
+    record = load_job_record(job_id)
+    if record is None:
+        return jsonify({'error': 'Unknown retraining job'}), 404
+    return jsonify(record), 200
+
 if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='AI Crop Recommendation ML Service')
+    parser.add_argument('--train', action='store_true', help='train and save the model bundle, then exit')
+    parser.add_argument('--dataset', help='with --train, CSV or Parquet file to train on instead of synthetic data')
+    parser.add_argument('--tune', action='store_true',
+                        help='with --train, sweep forest sizes and keep the smallest within --tolerance')
+    parser.add_argument('--tolerance', type=float, default=None,
+                        help=f'accuracy and yield R2 tolerance for --tune (default {TUNE_TOLERANCE})')
+    parser.add_argument('--profile', metavar='FILE', help='with --train, write a cProfile of the training run to FILE')
+    parser.add_argument('--build-catalog', metavar='CSV',
+                        help='convert a crop catalog CSV into a memory-mappable .joblib file beside it, then exit')
+    parser.add_argument('--build-grid', action='store_true',
+                        help='build and save the suitability grid for /predict/fast, then exit')
+    args = parser.parse_args()
+
+    if args.train:
+        if args.profile:
+            profile_call(args.profile, train_models, tune=args.tune, tolerance=args.tolerance,
+                         dataset_path=args.dataset)
+            logger.info(f"Training profile written to {args.profile}")
+        else:
+            train_models(tune=args.tune, tolerance=args.tolerance, dataset_path=args.dataset)
+        raise SystemExit(0)
+
+    if args.build_catalog:
+        catalog = CropCatalog.open(args.build_catalog)
+        path = catalog.save(os.path.splitext(args.build_catalog)[0] + '.joblib')
+        logger.info(f"Crop catalog saved to {path}: {len(catalog)} entries, version {catalog.version}")
+        raise SystemExit(0)
+
+    if args.build_grid:
+        load_crop_catalog(rebuild_grid=False)
+        grid = build_suitability_grid()
+        bundle = load_scoring_bundle() if os.path.exists(BUNDLE_PATH) else None
+        grid.report = suitability_grid_report(grid, bundle=bundle)
+        grid.save(SUITABILITY_GRID_PATH)
+        logger.info(f"Suitability grid saved to {SUITABILITY_GRID_PATH} ({grid.nbytes} bytes): {grid.report}")
+        raise SystemExit(0)
+
     logger.info("Starting AI Crop Recommendation ML Service...")
 
-    # Try to load existing models, otherwise train new ones
-    if not load_models():
-        logger.info("No existing models found, training new models...")
-        train_models()
+    # Load the model bundle, otherwise train new models
+    init_models()
 
     # Start Flask server
-    logger.info(f"ML Service ready! Model accuracy: {model_accuracy:.4f}")
+    logger.info(f"ML Service ready! Model accuracy: {model_bundle.accuracy:.4f}")
     app.run(
         host='0.0.0.0',
         port=8000,
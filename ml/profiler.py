@@ -0,0 +1,172 @@
+# Sampling Profiler
+# Opt-in cProfile capture for a sampled fraction of live requests and for training runs.
+# Nothing is profiled until the profiler is armed, and an unarmed profiler costs one
+# attribute check per request.
+#
+# At most one request per process is profiled at a time: cProfile hooks the thread that
+# enables it, and newer Pythons allow a single active profiler per process. Captured
+# profiles are merged and written as rotating .pstats files, readable with pstats,
+# snakeviz or flameprof.
+
+import cProfile
+import os
+import pstats
+import random
+import threading
+import time
+
+SORT_KEYS = ('cumulative', 'tottime', 'calls')
+
+def summarize(stats, top=20, sort='cumulative'):
+    """Top functions of a pstats.Stats as plain dicts"""
+    stats.sort_stats(sort)
+    rows = []
+    for function in stats.fcn_list[:top]:
+        primitive_calls, calls, total_time, cumulative_time, _ = stats.stats[function]
+        filename, line, name = function
+        rows.append({
+            'function': name,
+            'file': filename,
+            'line': line,
+            'calls': calls,
+            'primitive_calls': primitive_calls,
+            'total_seconds': round(total_time, 6),
+            'cumulative_seconds': round(cumulative_time, 6)
+        })
+    return rows
+
+class SamplingProfiler:
+    """cProfile a random fraction of requests while armed, up to a request budget"""
+
+    def __init__(self, directory, max_files=50, flush_every=20):
+        self.directory = directory
+        self.max_files = max_files
+        self.flush_every = flush_every
+        self.armed = False
+        self.sample_rate = 0.0
+        self.remaining = 0
+        self.path = None               # Only requests to this path are sampled, all when None
+        self.profile_training = False  # Profile the next training run in its worker process
+        self._slot = threading.Lock()  # Held by the one request being profiled
+        self._lock = threading.Lock()
+        self._window = None            # Profiles since the last file was written
+        self._window_count = 0
+        self._total = None             # Profiles since the profiler was armed
+        self._counts = {'profiled': 0, 'skipped_busy': 0, 'files_written': 0}
+        self.training_stats = None
+        self.training_file = None
+
+    def arm(self, sample_rate, max_requests, path=None, training=False):
+        """Profile about sample_rate of requests (to path) until max_requests have been profiled"""
+        with self._lock:
+            self._flush()
+            self._total = None
+            self._counts = {'profiled': 0, 'skipped_busy': 0, 'files_written': 0}
+            self.sample_rate = sample_rate
+            self.remaining = max_requests
+            self.path = path
+            self.profile_training = training
+            self.armed = sample_rate > 0 and max_requests > 0
+
+    def disarm(self):
+        """Stop profiling requests and write out what was captured"""
+        with self._lock:
+            self.armed = False
+            self.profile_training = False
+            self._flush()
+
+    def start(self, path, forced=False):
+        """A running cProfile.Profile if this request is sampled (or forced), otherwise None"""
+        sampled = (self.armed and (self.path is None or path == self.path)
+                   and random.random() < self.sample_rate)
+        if not (sampled or forced):
+            return None
+        if not self._slot.acquire(blocking=False):
+            self._counts['skipped_busy'] += 1
+            return None
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:  # Another profiler is active in this process
+            self._slot.release()
+            return None
+        return profile
+
+    def finish(self, profile):
+        """Stop a profile from start() and merge it into the current window"""
+        profile.disable()
+        self._slot.release()
+
+        with self._lock:
+            if self._window is None:
+                self._window = pstats.Stats(profile)
+            else:
+                self._window.add(profile)
+            if self._total is None:
+                self._total = pstats.Stats(profile)
+            else:
+                self._total.add(profile)
+            self._window_count += 1
+            self._counts['profiled'] += 1
+
+            if self.armed:
+                self.remaining -= 1
+                self.armed = self.remaining > 0
+            if self._window_count >= self.flush_every or not self.armed:
+                self._flush()
+
+    def _flush(self):
+        """Write the current window to a new file and drop the oldest files; caller holds _lock"""
+        if self._window is None:
+            return
+        name = f"requests-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self._counts['files_written']}.pstats"
+        self._write(self._window, name)
+        self._window, self._window_count = None, 0
+        self._counts['files_written'] += 1
+
+    def _write(self, stats, name):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, name)
+        stats.dump_stats(path)
+
+        files = sorted((entry for entry in os.scandir(self.directory) if entry.name.endswith('.pstats')),
+                       key=lambda entry: entry.stat().st_mtime)
+        for entry in files[:-self.max_files]:
+            os.remove(entry.path)
+        return path
+
+    def training_path(self, label):
+        """File a training run should dump its profile to, or None unless training profiling is on"""
+        with self._lock:
+            if not self.profile_training:
+                return None
+            self.profile_training = False  # One run only
+        os.makedirs(self.directory, exist_ok=True)
+        return os.path.join(self.directory, f"training-{label}.pstats")
+
+    def record_training(self, path):
+        """Load the profile a training run wrote to path for the summary endpoint"""
+        stats = pstats.Stats(path)
+        with self._lock:
+            self.training_stats, self.training_file = stats, path
+
+    def summary(self, source='requests', top=20, sort='cumulative'):
+        """Hot functions of the profiled requests (or the last profiled training run)"""
+        with self._lock:
+            stats = self._total if source == 'requests' else self.training_stats
+            return summarize(stats, top, sort) if stats is not None else []
+
+    def status(self):
+        with self._lock:
+            return dict(self._counts, armed=self.armed, sample_rate=self.sample_rate, path=self.path,
+                        remaining=max(self.remaining, 0), profile_training=self.profile_training,
+                        training_file=self.training_file, directory=self.directory)
+
+def profile_call(path, function, *args, **kwargs):
+    """Run function under cProfile and dump the stats to path; returns the function's result"""
+    profile = cProfile.Profile()
+    try:
+        return profile.runcall(function, *args, **kwargs)
+    finally:
+        profile.dump_stats(path)
@@ -0,0 +1,132 @@
+# Shadow Scoring
+# Scores a sampled fraction of live requests with a second (shadow) model bundle on a thread
+# pool, after the primary answer is computed and without the response waiting for it. Each
+# comparison records whether the top crop agrees, how far the class probabilities drift and
+# how long each bundle took, so a retrained or compacted model can be shown equivalent and
+# faster before it is promoted.
+#
+# Work beyond max_pending queued comparisons is dropped rather than queued, so a slow shadow
+# never builds up a backlog.
+
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+def aligned_probabilities(probabilities, classes, union):
+    """Probability columns reordered onto the union of class names, zero for missing classes"""
+    aligned = np.zeros((len(probabilities), len(union)))
+    aligned[:, np.searchsorted(union, classes)] = probabilities
+    return aligned
+
+def percentiles(values):
+    if not values:
+        return None
+    p50, p95, p99 = np.percentile(np.asarray(values), [50, 95, 99])
+    return {'mean': round(float(np.mean(values)), 6), 'p50': round(float(p50), 6),
+            'p95': round(float(p95), 6), 'p99': round(float(p99), 6)}
+
+class ShadowScorer:
+    """Compare a shadow bundle against the primary on sampled requests, off the response path"""
+
+    def __init__(self, bundle, score_function, sample_rate, max_workers=1, max_pending=64, window=10000,
+                 source=None):
+        self.bundle = bundle
+        self.score_function = score_function  # (bundle, X) -> class probabilities
+        self.sample_rate = sample_rate
+        self.max_pending = max_pending
+        self.source = source
+        self.loaded_at = time.time()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='shadow')
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._counts = {'sampled': 0, 'rows': 0, 'top1_agree': 0, 'dropped': 0, 'errors': 0}
+        self._total_variation = 0.0
+        self._max_total_variation = 0.0
+        self._last_error = None
+        self._primary_seconds = deque(maxlen=window)  # Paired per compared request
+        self._shadow_seconds = deque(maxlen=window)
+
+    def sampled(self):
+        return random.random() < self.sample_rate
+
+    def submit(self, classes, X, probabilities, primary_seconds):
+        """Queue a comparison of the primary's probabilities for X; returns False if dropped"""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._counts['dropped'] += 1
+                return False
+            self._pending += 1
+        try:
+            self._executor.submit(self._compare, classes, np.array(X), np.array(probabilities), primary_seconds)
+        except RuntimeError:  # Closed by an unload or promotion in the meantime
+            with self._lock:
+                self._pending -= 1
+            return False
+        return True
+
+    def _compare(self, classes, X, probabilities, primary_seconds):
+        try:
+            start = time.perf_counter()
+            shadow_probabilities = self.score_function(self.bundle, X)
+            shadow_seconds = time.perf_counter() - start
+
+            shadow_classes = self.bundle.label_encoder.classes_
+            if np.array_equal(classes, shadow_classes):
+                primary, shadow, names = probabilities, shadow_probabilities, classes
+            else:
+                names = np.union1d(classes, shadow_classes)
+                primary = aligned_probabilities(probabilities, classes, names)
+                shadow = aligned_probabilities(shadow_probabilities, shadow_classes, names)
+
+            # Stable argmax in both, so ties resolve to the same class as the responses do
+            agree = int(np.sum(names[np.argmax(primary, axis=1)] == names[np.argmax(shadow, axis=1)]))
+            total_variation = 0.5 * np.abs(primary - shadow).sum(axis=1)
+
+            with self._lock:
+                self._counts['sampled'] += 1
+                self._counts['rows'] += len(X)
+                self._counts['top1_agree'] += agree
+                self._total_variation += float(total_variation.sum())
+                self._max_total_variation = max(self._max_total_variation, float(total_variation.max()))
+                self._primary_seconds.append(primary_seconds)
+                self._shadow_seconds.append(shadow_seconds)
+        except Exception as e:
+            with self._lock:
+                self._counts['errors'] += 1
+                self._last_error = str(e)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._counts)
+            rows = counts['rows']
+            primary, shadow = list(self._primary_seconds), list(self._shadow_seconds)
+            total_variation, max_total_variation = self._total_variation, self._max_total_variation
+            pending, last_error = self._pending, self._last_error
+
+        primary_latency, shadow_latency = percentiles(primary), percentiles(shadow)
+        return dict(
+            counts,
+            pending=pending,
+            last_error=last_error,
+            sample_rate=self.sample_rate,
+            top1_agreement=round(counts['top1_agree'] / rows, 6) if rows else None,
+            mean_total_variation=round(total_variation / rows, 8) if rows else None,
+            max_total_variation=round(max_total_variation, 8) if rows else None,
+            primary_seconds=primary_latency,
+            shadow_seconds=shadow_latency,
+            mean_latency_difference=round(float(np.mean(np.subtract(shadow, primary))), 6) if primary else None,
+            speedup=round(primary_latency['p50'] / shadow_latency['p50'], 3)
+            if primary and shadow_latency['p50'] > 0 else None
+        )
+
+    def close(self):
+        """Stop taking comparisons; queued ones finish in the background"""
+        self.sample_rate = 0.0
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,106 @@
+# Precomputed Suitability Grid
+# Quantized lookup tables for the rule-based part of a recommendation: per-crop suitability
+# and per-condition band codes, answered without touching the forests.
+#
+# The yield factor is the mean of one independent factor per condition, so the dense 4-D grid
+# (ph x temperature x humidity x rainfall x crop) is exactly the sum of four per-axis tables.
+# Only those tables are stored, which keeps the grid a few hundred KB at fine resolution.
+
+import os
+
+import joblib
+import numpy as np
+
+GRID_FORMAT = 1
+
+class SuitabilityGrid:
+    """Per-axis suitability tables and band codes on evenly spaced grid points"""
+
+    def __init__(self, axes, factors, codes, crops, report=None, catalog_version=None):
+        self.axes = axes          # [(name, start, step, n_points)] in condition order
+        self.factors = factors    # per axis, (n_points, n_crops) condition factor of every crop
+        self.codes = codes        # per axis, (n_points,) band code at each grid point
+        self.crops = crops
+        self.report = report or {}
+        self.catalog_version = catalog_version  # Version of the crop catalog the tables were built from
+
+    @classmethod
+    def build(cls, axes, factor_function, code_function, crops, catalog_version=None):
+        """Evaluate factor_function(axis, points) and code_function(axis, points) on every axis"""
+        grid_axes, factors, codes = [], [], []
+        for i, (name, start, stop, step) in enumerate(axes):
+            n_points = int(round((stop - start) / step)) + 1
+            # Rounded so that inputs written with the step's decimals land exactly on a point
+            points = np.round(start + step * np.arange(n_points), 10)
+            grid_axes.append((name, float(start), float(step), n_points))
+            factors.append(np.ascontiguousarray(factor_function(i, points), dtype=np.float64))
+            codes.append(np.ascontiguousarray(code_function(i, points), dtype=np.int8))
+        return cls(grid_axes, factors, codes, list(crops), catalog_version=catalog_version)
+
+    def indices(self, values):
+        """Nearest grid point on every axis, or None if a value is outside the grid"""
+        result = []
+        for value, (_, start, step, n_points) in zip(values, self.axes):
+            index = int(round((value - start) / step))
+            if not 0 <= index < n_points:
+                return None
+            result.append(index)
+        return result
+
+    def lookup(self, values):
+        """Suitability of every crop and the band code per axis for one point, or None off the grid"""
+        try:
+            indices = self.indices(values)
+        except (ValueError, OverflowError):
+            return None  # NaN or infinite input
+        if indices is None:
+            return None
+
+        # Summed in axis order and then averaged, exactly as the rules compute the yield factor
+        suitability = self.factors[0][indices[0]].copy()
+        for axis in range(1, len(indices)):
+            suitability += self.factors[axis][indices[axis]]
+        suitability /= len(indices)
+        return suitability, [int(codes[index]) for codes, index in zip(self.codes, indices)]
+
+    def lookup_many(self, values):
+        """Vectorized lookup for an (n_samples, n_axes) array, clipping values to the grid"""
+        values = np.asarray(values, dtype=np.float64)
+        suitability = 0.0
+        codes = []
+        for axis, (_, start, step, n_points) in enumerate(self.axes):
+            index = np.clip(np.rint((values[:, axis] - start) / step), 0, n_points - 1).astype(np.intp)
+            suitability = suitability + self.factors[axis][index]
+            codes.append(self.codes[axis][index])
+        return suitability / len(self.axes), np.stack(codes, axis=1)
+
+    def save(self, path):
+        """Write the grid uncompressed so it can be memory-mapped; replaced atomically"""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        joblib.dump({
+            'format': GRID_FORMAT,
+            'axes': self.axes,
+            'factors': self.factors,
+            'codes': self.codes,
+            'crops': self.crops,
+            'report': self.report,
+            'catalog_version': self.catalog_version
+        }, tmp_path)
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        """Load a saved grid with its tables memory-mapped read-only"""
+        payload = joblib.load(path, mmap_mode='r')
+        if payload.get('format') != GRID_FORMAT:
+            raise ValueError(f"Unsupported suitability grid format: {payload.get('format')}")
+        # Plain ndarray views of the maps index faster than np.memmap objects
+        factors = [np.asarray(table) for table in payload['factors']]
+        codes = [np.asarray(table) for table in payload['codes']]
+        return cls(payload['axes'], factors, codes, payload['crops'], payload['report'],
+                   payload.get('catalog_version'))
+
+    @property
+    def nbytes(self):
+        return sum(table.nbytes for table in self.factors) + sum(codes.nbytes for codes in self.codes)
@@ -0,0 +1,85 @@
+# Compiled Forest Parity Tests
+# Fits small scikit-learn forests and checks CompiledForest reproduces them: bit for bit as
+# compiled, within COMPACT_PARITY_TOLERANCE once compacted to float32.
+#
+#   cd ml && python -m pytest -q test_forest_engine.py
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+
+from forest_engine import COMPACT_PARITY_TOLERANCE, CompiledForest, parity_probe, verify_parity
+
+N_FEATURES = 7
+
+def training_data(n_samples=400, n_classes=5, random_state=0):
+    rng = np.random.RandomState(random_state)
+    X = rng.normal(0, 1, size=(n_samples, N_FEATURES))
+    labels = np.digitize(X[:, 0] + 0.5 * X[:, 3], np.linspace(-1.5, 1.5, n_classes - 1))
+    target = 2.0 * X[:, 1] - X[:, 4] ** 2 + rng.normal(0, 0.1, n_samples)
+    return X, labels, target
+
+@pytest.fixture(scope='module')
+def forests():
+    X, labels, target = training_data()
+    classifier = RandomForestClassifier(n_estimators=15, max_depth=8, random_state=0).fit(X, labels)
+    regressor = RandomForestRegressor(n_estimators=15, max_depth=8, random_state=0).fit(X, target)
+    return classifier, regressor
+
+@pytest.fixture(scope='module')
+def probe():
+    return parity_probe(N_FEATURES, 2000)
+
+def test_classifier_probabilities_match_exactly(forests, probe):
+    classifier, _ = forests
+    compiled = CompiledForest.from_sklearn(classifier)
+    assert compiled.is_classifier
+    assert np.array_equal(compiled.predict_proba(probe), classifier.predict_proba(probe))
+    assert np.array_equal(classifier.classes_[compiled.predict(probe)], classifier.predict(probe))
+
+def test_regressor_predictions_match_exactly(forests, probe):
+    _, regressor = forests
+    compiled = CompiledForest.from_sklearn(regressor)
+    assert not compiled.is_classifier
+    assert np.array_equal(compiled.predict(probe), regressor.predict(probe))
+
+def test_unbounded_depth_forest_matches_exactly(probe):
+    X, labels, _ = training_data(n_samples=300, n_classes=8, random_state=1)
+    classifier = RandomForestClassifier(n_estimators=5, random_state=1).fit(X, labels)
+    compiled = CompiledForest.from_sklearn(classifier)
+    assert compiled.max_depth == max(estimator.tree_.max_depth for estimator in classifier.estimators_)
+    assert np.array_equal(compiled.predict_proba(probe), classifier.predict_proba(probe))
+
+def test_compact_forests_match_within_tolerance(forests, probe):
+    for forest in forests:
+        compiled = CompiledForest.from_sklearn(forest).compact()
+        assert compiled.is_compact
+        if compiled.is_classifier:
+            expected, actual = forest.predict_proba(probe), compiled.predict_proba(probe)
+        else:
+            expected, actual = forest.predict(probe), compiled.predict(probe)
+        assert np.allclose(actual, expected, rtol=COMPACT_PARITY_TOLERANCE, atol=COMPACT_PARITY_TOLERANCE)
+        assert verify_parity(forest, compiled, probe, COMPACT_PARITY_TOLERANCE)
+
+def test_compact_forest_keeps_split_decisions(forests, probe):
+    classifier, _ = forests
+    compiled = CompiledForest.from_sklearn(classifier)
+    assert np.array_equal(compiled.compact().apply(probe), compiled.apply(probe))
+
+def test_single_row_matches(forests, probe):
+    for forest in forests:
+        compiled = CompiledForest.from_sklearn(forest)
+        assert verify_parity(forest, compiled, probe[:1])
+
+def test_non_finite_input_is_rejected(forests):
+    compiled = CompiledForest.from_sklearn(forests[0])
+    X = np.zeros((2, N_FEATURES))
+    X[1, 2] = np.nan
+    with pytest.raises(ValueError):
+        compiled.predict_proba(X)
+
+def test_verify_parity_detects_a_mismatch(forests, probe):
+    _, regressor = forests
+    compiled = CompiledForest.from_sklearn(regressor)
+    compiled.value = compiled.value + 1e-3
+    assert not verify_parity(regressor, compiled, probe)
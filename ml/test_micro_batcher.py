@@ -0,0 +1,87 @@
+# Micro-Batcher Tests
+# Two callers landing in one batching window: a failing item must not fail the other, both
+# for the batcher on its own and for /predict with micro-batching on.
+#
+#   cd ml && python -m pytest -q test_micro_batcher.py
+
+import threading
+
+import numpy as np
+import pytest
+
+import ml_service
+from micro_batcher import MicroBatcher
+
+WINDOW_MS = 200
+
+def submit_together(submit, items):
+    """Call submit(item) for every item from its own thread at once; results or exceptions in item order"""
+    results = [None] * len(items)
+    barrier = threading.Barrier(len(items))
+
+    def call(i):
+        barrier.wait()
+        try:
+            results[i] = submit(items[i])
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(len(items))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+def double_or_fail(items):
+    if any(item is None for item in items):
+        raise ValueError('bad item')
+    return [item * 2 for item in items]
+
+def test_batch_scores_every_item():
+    batcher = MicroBatcher(double_or_fail, window_ms=WINDOW_MS)
+    assert submit_together(batcher.submit, [1, 2, 3]) == [2, 4, 6]
+    stats = batcher.stats()
+    assert stats['rows'] == 3 and stats['errors'] == 0
+
+def test_failing_item_does_not_fail_its_batch():
+    batcher = MicroBatcher(double_or_fail, window_ms=WINDOW_MS)
+    good, bad = submit_together(batcher.submit, [21, None])
+    assert good == 42
+    assert isinstance(bad, ValueError)
+    assert batcher.stats()['largest_batch'] == 2
+
+def test_single_failing_item_gets_its_error():
+    batcher = MicroBatcher(double_or_fail, window_ms=1)
+    with pytest.raises(ValueError):
+        batcher.submit(None)
+
+@pytest.fixture(scope='module')
+def service():
+    """ml_service with a small freshly trained bundle installed, micro-batching on and no cache"""
+    ml_service.install_models(ml_service.fit_models(2000, parallel=False))
+    saved = ml_service.micro_batcher, ml_service.prediction_cache
+    ml_service.micro_batcher = MicroBatcher(ml_service.score_micro_batch, window_ms=WINDOW_MS)
+    ml_service.prediction_cache = None
+    yield ml_service
+    ml_service.micro_batcher, ml_service.prediction_cache = saved
+
+def test_predict_rejects_non_finite_without_failing_the_batch(service):
+    def post(body):
+        response = service.app.test_client().post('/predict', json=body)
+        return response.status_code, response.get_json()
+
+    (bad_status, _), (nan_status, _), (good_status, good) = submit_together(
+        post, [{'ph': 'inf'}, {'rainfall': 'nan'}, {'ph': 6.5}])
+    assert bad_status == 400 and nan_status == 400
+    assert good_status == 200 and good['recommendations']
+
+def test_micro_batched_predictions_match_direct_scoring(service):
+    records = [{'ph': 6.5}, {'ph': 5.2, 'rainfall': 1500}, {'temperature': 30, 'humidity': 85}]
+    batched = submit_together(lambda record: service.app.test_client().post('/predict', json=record).get_json(),
+                              records)
+    for record, response in zip(records, batched):
+        X = np.array([service.parse_feature_record(record)])
+        probabilities, _ = service.score_feature_matrix(service.model_bundle, X, predict_yield=False)
+        expected = service.build_recommendations(service.model_bundle, X, probabilities)[0]
+        assert response['recommendations'] == expected
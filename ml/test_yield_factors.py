@@ -0,0 +1,41 @@
+# Yield Factor Parity Tests
+# indexed_yield_factors (one crop per sample, used for the synthetic dataset) must agree bit for
+# bit with suitability_matrix and condition_factors (every crop per sample, used for ranking).
+#
+#   cd ml && python -m pytest -q test_yield_factors.py
+
+import numpy as np
+import pytest
+
+import ml_service
+from ml_service import CROP_BOUNDS, CROP_NAMES
+
+@pytest.fixture(scope='module')
+def samples():
+    rng = np.random.default_rng(0)
+    n = 5000
+    crop_index = rng.integers(len(CROP_NAMES), size=n)
+    conditions = (rng.uniform(3.5, 10, n), rng.uniform(-5, 50, n), rng.uniform(10, 100, n),
+                  rng.uniform(0, 3500, n))
+    return crop_index, conditions
+
+def test_indexed_factors_match_the_suitability_matrix(samples):
+    crop_index, conditions = samples
+    matrix = ml_service.suitability_matrix(*conditions, CROP_BOUNDS)
+    indexed = ml_service.indexed_yield_factors(crop_index, *conditions)
+    assert np.array_equal(indexed, matrix[np.arange(len(crop_index)), crop_index])
+
+def test_condition_factors_match_one_crop_row(samples):
+    crop_index, conditions = samples
+    for row in range(len(CROP_NAMES)):
+        for condition, value in enumerate(conditions):
+            every_crop = ml_service.condition_factors(condition, value, CROP_BOUNDS)
+            one_crop = ml_service.condition_factors(condition, value, CROP_BOUNDS[row:row + 1])
+            indexed = ml_service.condition_factor(condition, value, CROP_BOUNDS[np.full(len(value), row)])
+            assert np.array_equal(one_crop[:, 0], every_crop[:, row])
+            assert np.array_equal(indexed, every_crop[:, row])
+
+def test_scalar_inputs_give_one_row():
+    factors = ml_service.suitability_matrix(6.5, 25, 70, 1200, CROP_BOUNDS)
+    assert factors.shape == (1, len(CROP_NAMES))
+    assert ml_service.indexed_yield_factors(np.array([3]), 6.5, 25, 70, 1200)[0] == factors[0, 3]
@@ -0,0 +1,8 @@
+# WSGI entry point for production serving
+# gunicorn -c gunicorn.conf.py wsgi:app
+# With preload_app the model bundle is loaded once here, in the gunicorn master,
+# and forked workers share its memory copy-on-write
+
+from ml_service import app, init_models
+
+init_models()